@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import logging
+import argparse
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QTimer, QSize, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"WLANIM01"
+HEADER = struct.Struct("<8sQ")   # magic, index length
+ALIGN = 64
+FORMAT = QImage.Format.Format_ARGB32_Premultiplied
+DEFAULT_DELAY_MS = 100
+
+STORE_NAME = "animations.bin"
+
+# Sizes the UI draws each kind of animation at. Icons are painted unscaled
+# by the hourly (40px) and weekly (48px) delegates, effects are stretched
+# over the window so they are stored at its default size.
+ICON_SIZES = ((40, 40), (48, 48))
+EFFECT_SIZE = (450, 450)
+
+def store_key(relpath, size):
+    return f"{relpath.replace(os.sep, '/')}@{size.width()}x{size.height()}"
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+# Content hash of a source GIF, an edited file of the same size still differs
+def source_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+# Every frame of a GIF at one size as premultiplied ARGB32, plus delays in ms
+def decode_frames(path, size):
+    reader = QImageReader(path)
+    reader.setScaledSize(size)
+    frames, delays = [], []
+    while reader.canRead():
+        image = reader.read()
+        if image.isNull():
+            break
+        delay = reader.nextImageDelay()
+        frames.append(image.convertToFormat(FORMAT))
+        delays.append(delay if delay > 0 else DEFAULT_DELAY_MS)
+    return frames, delays
+
+# -------------------------------------------------------------
+# BUILD STEP
+# -------------------------------------------------------------
+# Decodes every (GIF, size) pair once and writes a single file:
+#   header | JSON index | padding | frame pixels, each frame 64 byte aligned
+# The index records each animation's geometry, frame offsets, delays and the
+# size and hash of the GIF it came from so stale entries can be spotted.
+def build_store(assets_dir, out_path, specs):
+    index = {}
+    blobs = []
+    offset = 0
+    for relpath, sizes in specs:
+        source = os.path.join(assets_dir, relpath)
+        if not os.path.exists(source):
+            log.warning("Skipping missing %s", relpath)
+            continue
+        digest = source_digest(source)
+        for w, h in sizes:
+            size = QSize(w, h)
+            frames, delays = decode_frames(source, size)
+            if not frames:
+                log.warning("Could not decode %s", relpath)
+                continue
+            offsets = []
+            for image in frames:
+                data = image.constBits().asstring(image.sizeInBytes())
+                offsets.append(offset)
+                blobs.append((offset, data))
+                offset = _aligned(offset + len(data))
+            index[store_key(relpath, size)] = {
+                "width": frames[0].width(),
+                "height": frames[0].height(),
+                "stride": frames[0].bytesPerLine(),
+                "offsets": offsets,
+                "delays": delays,
+                "source_size": os.path.getsize(source),
+                "source_sha1": digest,
+            }
+
+    header = json.dumps({"version": 2, "animations": index}, separators=(",", ":")).encode("utf-8")
+    data_start = _aligned(HEADER.size + len(header))
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        for blob_offset, data in blobs:
+            f.seek(data_start + blob_offset)
+            f.write(data)
+        f.truncate(data_start + offset)
+    os.replace(tmp, out_path)
+    return index
+
+def default_specs(assets_dir):
+    specs = []
+    for folder, sizes in (("icons", ICON_SIZES), ("effects", (EFFECT_SIZE,))):
+        path = os.path.join(assets_dir, folder)
+        for name in sorted(os.listdir(path)) if os.path.isdir(path) else []:
+            if name.endswith(".gif"):
+                specs.append((os.path.join(folder, name), sizes))
+    return specs
+
+# -------------------------------------------------------------
+# RUNTIME STORE
+# -------------------------------------------------------------
+# The built file mapped into memory. frames() hands out QImages that point
+# straight into the mapping, no decoding and no copy, and because the pages
+# come from the page cache every process showing the widget shares them.
+# The mapping is copy-on-write so nothing can ever write back to the file.
+class AnimationStore:
+
+    def __init__(self, path, assets_dir=None):
+        self.path = path
+        self.assets_dir = assets_dir or os.path.dirname(path)
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not an animation store")
+        index = json.loads(self._map[HEADER.size:HEADER.size + length])
+        self.index = index["animations"]
+        self.data_start = _aligned(HEADER.size + length)
+        # Address of the mapping, frames are QImages over base + offset
+        self._view = memoryview(self._map)
+        self._base = int(sip.voidptr(self._view))
+        self._checked = {}
+        self._digests = {}
+
+    # None when there is no usable store (not built yet, unreadable)
+    @classmethod
+    def open(cls, path, assets_dir=None):
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path, assets_dir)
+        except (OSError, ValueError, struct.error) as e:
+            log.warning("Animation store %s unusable: %s", path, e)
+            return None
+
+    def _lookup(self, path, size):
+        relpath = os.path.relpath(path, self.assets_dir)
+        key = store_key(relpath, size)
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        # The GIF was replaced since the store was built. Sizes are compared
+        # first, each GIF is hashed at most once however many sizes it has.
+        fresh = self._checked.get(key)
+        if fresh is None:
+            try:
+                fresh = os.path.getsize(path) == entry["source_size"]
+                if fresh:
+                    if path not in self._digests:
+                        self._digests[path] = source_digest(path)
+                    fresh = self._digests[path] == entry.get("source_sha1")
+            except OSError:
+                fresh = True   # frozen builds ship the store without the GIFs
+            self._checked[key] = fresh
+        return entry if fresh else None
+
+    def __contains__(self, item):
+        path, size = item
+        return self._lookup(path, size) is not None
+
+    # ([QImage], [delay ms]) wrapping the mapped pixels, or None if not stored
+    def frames(self, path, size):
+        entry = self._lookup(path, size)
+        if entry is None:
+            return None
+        w, h, stride = entry["width"], entry["height"], entry["stride"]
+        images = [QImage(sip.voidptr(self._base + self.data_start + offset), w, h, stride, FORMAT)
+                  for offset in entry["offsets"]]
+        return images, entry["delays"]
+
+# -------------------------------------------------------------
+# FRAME ANIMATION
+# -------------------------------------------------------------
+# Plays stored frames with their own delays. Implements the parts of QMovie
+# the window uses (frameChanged, currentImage, currentFrameNumber, frameCount,
+# start, stop, setPaused, jumpToNextFrame) so it can stand in for one.
+class FrameAnimation(QObject):
+    frameChanged = pyqtSignal(int)
+
+    def __init__(self, frames, delays, parent=None):
+        super().__init__(parent)
+        self.frames = frames
+        self.delays = delays
+        self.index = 0
+        self.running = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._advance)
+
+    def currentImage(self):
+        return self.frames[self.index]
+
+    def currentFrameNumber(self):
+        return self.index
+
+    def frameCount(self):
+        return len(self.frames)
+
+    def start(self):
+        self.running = len(self.frames) > 1
+        if self.running:
+            self._timer.start(self.delays[self.index])
+
+    def stop(self):
+        self.running = False
+        self._timer.stop()
+
+    # Stopping keeps the current frame, so pausing is just stop/start
+    def setPaused(self, paused):
+        if paused:
+            self.stop()
+        else:
+            self.start()
+
+    def jumpToNextFrame(self):
+        self.index = (self.index + 1) % len(self.frames)
+        self.frameChanged.emit(self.index)
+        return True
+
+    def _advance(self):
+        self.jumpToNextFrame()
+        if self.running:
+            self._timer.start(self.delays[self.index])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-decode icon and effect GIFs into a memory mapped store")
+    base = os.path.dirname(os.path.abspath(__file__))
+    parser.add_argument("--assets", default=os.path.join(base, "assets"))
+    parser.add_argument("--output", help=f"defaults to <assets>/{STORE_NAME}")
+    parser.add_argument("--icons-only", action="store_true", help="skip the (large) window sized effects")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QGuiApplication
+    app = QGuiApplication(sys.argv[:1])
+
+    specs = default_specs(args.assets)
+    if args.icons_only:
+        specs = [spec for spec in specs if spec[0].startswith("icons")]
+    output = args.output or os.path.join(args.assets, STORE_NAME)
+    index = build_store(args.assets, output, specs)
+    frames = sum(len(entry["offsets"]) for entry in index.values())
+    print(f"{len(index)} animations, {frames} frames, {os.path.getsize(output) / 1e6:.1f} MB -> {output}")
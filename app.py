@@ -1,16 +1,39 @@
-from collections import Counter
+import time
+STARTUP_T0 = time.perf_counter()
 import os
 import sys
+
+# Frozen builds start the audio process from this executable, hand over
+# before the heavy imports below
+if __name__ == "__main__" and sys.argv[1:2] == ["--audio-worker"]:
+    from audioEngine import run_worker
+    sys.exit(run_worker())
+
 import json
-import pygame
-import geocoder
 import random
+import argparse
 from PyQt6.QtGui import QKeySequence, QShortcut
 from datetime import datetime, timedelta, timezone
-from openWeatherMapAPI import OpenWeatherClient
-from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QLabel, QStackedLayout, QVBoxLayout, QHBoxLayout, QComboBox, QMessageBox, QSizePolicy, QGridLayout, QScrollArea
+from openWeatherMapAPI import OpenWeatherClient, Location, OPENWEATHER_URL
+from weatherBundle import WeatherBundle
+from weatherCache import ResponseCache
+from weatherHistory import HistoryStore
+from resourceMonitor import ResourceMonitor, DEFAULT_INTERVAL_S
+from renderGovernor import RenderGovernor, FULL
+from weatherTransport import Transport
+from placeSearch import GeocodeCache, PlaceTrie, format_place, load_bundled_places, load_last_location, save_last_location, load_watch_list, save_watch_list
+from weatherWorker import WeatherFetcher, StallMonitor, BackgroundRunner
+from startupProfile import StartupProfiler
+from renderCache import RenderCache, FrameTimer, BackgroundLoader
+from iconPool import IconPool
+from animationStore import AnimationStore, FrameAnimation, EFFECT_SIZE, STORE_NAME
+from audioEngine import AudioEngine
+from refreshScheduler import RefreshScheduler, RefreshPlan
+from forecastViews import RowModel, RowRole, WeeklyView, HourlyView
+from metrics import metrics, traced, MetricsServer, DEFAULT_PORT as METRICS_PORT
+from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QLabel, QStackedLayout, QVBoxLayout, QHBoxLayout, QComboBox, QMessageBox, QSizePolicy, QCompleter
 from PyQt6.QtGui import QGuiApplication, QFont, QPixmap, QPainter, QMovie, QIcon
-from PyQt6.QtCore import Qt, QSize, QTimer
+from PyQt6.QtCore import Qt, QSize, QTimer, QStringListModel, QEvent
 
 # -------------------------------------------------------------
 # PATH HELPERS
@@ -104,6 +127,20 @@ MUSIC_MAP = {
     ],
 
 }
+# Used until the IP lookup finishes on the very first run
+DEFAULT_LOCATION = {"city": "London", "lat": 51.5073, "lon": -0.1276, "source": "ip"}
+
+# -------------------------------------------------------------
+# DEFERRED START UP WORK (runs on worker threads)
+# -------------------------------------------------------------
+# Detect user city based on IP
+def lookup_ip_location(api):
+    import geocoder
+    geolocation = geocoder.ip("me")
+    city = geolocation.city if geolocation.city else "London"
+    geo = api.geocode(city)
+    return city, (geo[0] if geo else None)
+
 # -------------------------------------------------------------
 # METRIC WIDGET
 # -------------------------------------------------------------
@@ -197,19 +234,73 @@ class ClickableWidget(QWidget):
             self.clicked()
         super().mousePressEvent(event)
 
+# Span timings drawn over the window, toggled with CTRL+I. Showing it turns
+# the metrics registry on, hiding it puts it back the way it was.
+class MetricsOverlay(QLabel):
+    def __init__(self, registry, parent=None):
+        super().__init__(parent)
+        self.registry = registry
+        self.was_enabled = registry.enabled
+        self.setStyleSheet("""
+            background: rgba(0,0,0,170);
+            color: white;
+            font-family: monospace;
+            font-size: 11px;
+            padding: 6px;
+            border-radius: 8px;
+        """)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.timer = QTimer(self)
+        self.timer.setInterval(500)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        if self.isVisible():
+            self.timer.stop()
+            self.hide()
+            self.registry.enabled = self.was_enabled
+            return
+        self.was_enabled = self.registry.enabled
+        self.registry.enabled = True
+        self.refresh()
+        self.show()
+        self.raise_()
+        self.timer.start()
+
+    def refresh(self):
+        snapshot = self.registry.snapshot()
+        lines = [f"{'span (ms)':<22}{'n':>6}{'p50':>7}{'p95':>7}{'max':>8}"]
+        for name, span in snapshot["spans"].items():
+            lines.append(f"{name:<22}{span['count']:>6}{span['p50_ms']:>7.0f}{span['p95_ms']:>7.0f}{span['max_ms']:>8.1f}")
+        for name, value in snapshot["counters"].items():
+            lines.append(f"{name:<22}{value:>6}")
+        for name, value in snapshot["gauges"].items():
+            lines.append(f"{name:<22}{value:>6}")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(10, self.parentWidget().height() - self.height() - 10)
+
 
 # -------------------------------------------------------------
 # MAIN APP
 # -------------------------------------------------------------
 class LofiWeatherApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, profiler=None):
         super().__init__()
+        self.profiler = profiler or StartupProfiler()
+        self.profiler.begin("window")
+        self.profiler.begin("first paint")
+        self._painted = False
+
         self.setWindowTitle("The weather lounge")
         self.resize(450,450)
         self.move_to_top_right()
 
-        # Start audio engine
-        pygame.mixer.init()
+        # Music plays in a separate process, started once the window is shown
+        self.audio = AudioEngine()
+        self.audio_started_once = False
+        self.next_tracks = {}
 
         # IMPORTANT: central widget for layouts
         glass = QWidget(self)
@@ -230,15 +321,63 @@ class LofiWeatherApp(QMainWindow):
 
         # Background + foreground animation + music
         self.background = QPixmap()
+        self.background_path = None
+        self.wanted_background = None
+        self.foreground_path = None
         self.movie = None
         self.music = None
 
-        # Detect user city based on IP
-        geolocation = geocoder.ip("me")
-        location = geolocation.city if geolocation.city else "London"
-
-        # Connect to OpenWeatherMap API
-        self.api = OpenWeatherClient(API_Key, location)
+        # Window sized frames are rendered once and reused, paint cost is measured
+        self.render_cache = RenderCache(max_bytes=config.get("render_cache_mb", 96) * 1024 * 1024)
+        self.frame_timer = FrameTimer()
+
+        # Animations pause while hidden/covered, hold still on battery or high
+        # load and repaint at most max_fps times a second otherwise
+        self.governor = RenderGovernor.from_config(self, config.get("render"), parent=self)
+        self.governor.modeChanged.connect(self.apply_render_mode)
+
+        # Backgrounds are decoded off the GUI thread at window size and kept in an LRU
+        self.bg_loader = BackgroundLoader(parent=self)
+        self.bg_loader.ready.connect(self.background_loaded)
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(150)
+        self.resize_timer.timeout.connect(self.reload_background)
+
+        # Pre-decoded icon/effect frames mapped from disk (python animationStore.py),
+        # GIFs are only decoded at runtime when the store is missing or stale
+        self.animations = AnimationStore.open(get_asset(STORE_NAME))
+
+        # Weekly/hourly GIF icons share decoded frames and one animation timer
+        self.icon_pool = IconPool(interval_ms=max(40, self.governor.frame_interval_ms),
+                                  store=self.animations, parent=self)
+        self.icon_pool.pause()
+        self.governor.start()
+
+        # What is currently on screen, so refreshes only touch changed widgets
+        self._rendered = {}
+        self._last_digest = None
+        self._hourly_rows = {}
+        self.widgets_updated = 0
+        self.last_update_count = 0
+
+        # Connect to OpenWeatherMap API, responses are cached on disk
+        self.cache = ResponseCache(config.get("cache_dir"), max_entries=config.get("cache_max_entries", 200))
+        self.geo_cache = GeocodeCache(os.path.join(self.cache.path, "geocode.json"))
+
+        # Start from the last known location, no IP lookup or geocoding before first paint
+        self.last_location_file = os.path.join(self.cache.path, "last_location.json")
+        last = load_last_location(self.last_location_file) or DEFAULT_LOCATION
+        self.location_source = last.get("source", "user")
+        self.api = OpenWeatherClient(API_Key, last["city"], cache=self.cache, geo_cache=self.geo_cache,
+                                     lat=last["lat"], lon=last["lon"],
+                                     transport=Transport.from_config(config.get("http")),
+                                     base_url=config.get("daemon_url", OPENWEATHER_URL),
+                                     provider=config.get("provider", "2.5"))
+
+        # Prefix index over bundled and previously resolved places
+        self.places = PlaceTrie(load_bundled_places(get_asset("places.json")))
+        self.places.add_many(self.geo_cache.known_places())
         
         # Dropdown search box at top-left
         self.location_dropdown = QComboBox(self)
@@ -288,25 +427,143 @@ class LofiWeatherApp(QMainWindow):
         # Store last lookup results
         self._last_geo_results = None
 
+        # Suggestions while typing, filtered locally so no network is needed
+        self._suggestions = {}
+        self.suggestion_model = QStringListModel(self)
+        self.completer = QCompleter(self.suggestion_model, self)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.completer.popup().setStyleSheet("""
+            background: rgba(30,30,30,150);
+            color: white;
+            border: 1px solid rgba(255,255,255,50);
+        """)
+        self.location_dropdown.setCompleter(self.completer)
+        self.completer.activated[str].connect(self.select_suggestion)
+
+        # Short debounce so fast typing only searches once
+        self.typeahead_timer = QTimer(self)
+        self.typeahead_timer.setSingleShot(True)
+        self.typeahead_timer.setInterval(150)
+        self.typeahead_timer.timeout.connect(self.update_suggestions)
+        line_edit.textEdited.connect(lambda _: self.typeahead_timer.start())
+
         # Stacked layout inside main layout
         self.layout_stack = QStackedLayout()
         self.main_layout.addWidget(self.location_dropdown) 
+
+        # Watched cities, refreshed together in one batch
+        self.watch_list_file = os.path.join(self.cache.path, "watch_list.json")
+        self.watch_list = load_watch_list(self.watch_list_file, config.get("watch", []))
+        self.main_layout.addWidget(self.build_watch_strip())
         self.main_layout.addLayout(self.layout_stack)   
 
         # Create UI Layouts
         screen1 = self.layout_one()
         self.layout_stack.addWidget(screen1)
 
-        self.update_weather()
-
-        # Auto-update weather every hour (3600000 ms)
-        self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self.update_weather)
-        self.update_timer.start(3600000)  # 1 hour in milliseconds
+        # Fetch weather on worker threads, UI updates when results arrive
+        self.fetcher = WeatherFetcher(self.api, max_concurrency=config.get("max_concurrency", 8), parent=self)
+        self.fetcher.many_ready.connect(self.update_watch_strip)
+        self.fetcher.ready.connect(self.apply_weather)
+        self.fetcher.failed.connect(self.weather_failed)
+        self.fetcher.places_ready.connect(self.places_found)
+        self.fetcher.places_failed.connect(self.places_search_failed)
+        self.runner = BackgroundRunner(self.fetcher.pool, parent=self)
+
+        # Every refresh is kept locally for trends, written from the worker pool
+        history_config = dict(config.get("history", {}))
+        self.history = None
+        if history_config.pop("enabled", True):
+            self.history = HistoryStore.from_config(os.path.join(self.cache.path, "history.sqlite3"), history_config)
+
+        # Measure how long the event loop is blocked during a refresh
+        self.stall_monitor = StallMonitor(budget_ms=config.get("stall_budget_ms", 50), parent=self)
+
+        # Auto-update weather just after new data is published, paused while hidden.
+        # Created before the cached paint below, apply_weather reports to it
+        self.scheduler = RefreshScheduler(RefreshPlan(**config.get("refresh", {})), parent=self)
+        self.scheduler.due.connect(self.update_weather)
+        self.scheduler.due.connect(self.refresh_watch_list)
+
+        # Paint last known weather straight away, then revalidate in the background
+        cached = self.api.get_cached_weather()
+        if cached:
+            self.apply_weather(cached)
 
         mute = QShortcut(QKeySequence("Ctrl+M"), self)
         mute.activated.connect(self.toggle_music)
 
+        # Timing overlay, and /metrics on localhost when enabled in config.json
+        self.metrics_overlay = MetricsOverlay(metrics, self)
+        overlay = QShortcut(QKeySequence("Ctrl+I"), self)
+        overlay.activated.connect(self.metrics_overlay.toggle)
+
+        # Memory and live object gauges, only sampled while metrics are on
+        resource_config = config.get("resources", {})
+        self.resource_monitor = ResourceMonitor(self, resource_config.get("interval", DEFAULT_INTERVAL_S),
+                                                trace=resource_config.get("tracemalloc", False), parent=self)
+        self.resource_monitor.start()
+        overlay.activated.connect(self.resource_monitor.sample)
+        self.metrics_server = None
+        metrics_config = config.get("metrics", {})
+        if metrics_config.get("enabled"):
+            metrics.enabled = True
+            try:
+                self.metrics_server = MetricsServer(port=metrics_config.get("port", METRICS_PORT))
+                self.metrics_server.start()
+            except OSError as e:
+                print(f"Metrics endpoint unavailable: {e}", file=sys.stderr)
+
+        # Add/remove the current city from the watched strip
+        watch = QShortcut(QKeySequence("Ctrl+D"), self)
+        watch.activated.connect(self.toggle_watch)
+
+        self.profiler.end("window")
+
+        # Everything slow happens after the window is on screen
+        QTimer.singleShot(0, self.finish_startup)
+
+    # Phase two of start up: fetch, audio and IP lookup, all off the GUI thread
+    def finish_startup(self):
+        self.profiler.expect("first paint", "first weather", "audio")
+
+        self.profiler.begin("first weather")
+        self.update_weather()
+        self.refresh_watch_list()
+
+        # Commands sent before this (the cached paint) were held by the engine
+        # and go down the pipe now, the worker reads them once it is ready
+        self.profiler.begin("audio")
+        self.audio.start()
+        self.runner.run(self.audio.wait_ready, self.audio_started, self.audio_failed)
+
+        # A city picked by hand is kept, otherwise check where we are now (never when replaying)
+        if self.location_source == "ip" and not self.api.transport.offline:
+            self.profiler.expect("ip lookup")
+            self.profiler.begin("ip lookup")
+            self.runner.run(lambda: lookup_ip_location(self.api), self.ip_location_found, self.ip_location_failed)
+
+    def audio_started(self, audio):
+        self.profiler.end("audio")
+
+    def audio_failed(self, error):
+        print(f"Audio unavailable: {error}", file=sys.stderr)
+        self.profiler.end("audio")
+
+    def ip_location_found(self, result):
+        self.profiler.end("ip lookup")
+        city, geo = result
+        # The user may have picked a city while the lookup was running
+        if geo is None or self.location_source != "ip":
+            return
+        if (round(geo["lat"], 2), round(geo["lon"], 2)) != (round(self.api.lat, 2), round(self.api.lon, 2)):
+            self.location_dropdown.setEditText(city)
+            self.set_city(geo, city, source="ip")
+
+    def ip_location_failed(self, error):
+        self.profiler.end("ip lookup")
+
 
 
     # Place window at top-right corner of the screen
@@ -315,32 +572,81 @@ class LofiWeatherApp(QMainWindow):
         geo = screen.availableGeometry()
         self.move(geo.width() - self.width(), 0)
 
+    # Window size in device pixels, backgrounds are decoded at exactly this size
+    def background_pixel_size(self):
+        return RenderCache.pixel_size(self.size(), self.devicePixelRatioF())
+
     def update_background(self, path):
-        self.background = QPixmap(path)
+        self.wanted_background = path
+        pix = self.bg_loader.get(path, self.background_pixel_size())
+        if pix is None:
+            # Keep showing the current image until the decode finishes
+            self.bg_loader.request(path, self.background_pixel_size())
+            return
+        if pix is self.background:
+            return
+        self.background = pix
+        self.background_path = path
+        self.render_cache.clear()
         self.update()
 
+    def background_loaded(self, path):
+        if path == self.wanted_background:
+            self.update_background(path)
+
+    @traced("ui.movie_load")
     def update_foreground(self, path):
+        # Movies are parented to the window and deleted when replaced, so
+        # weeks of scene changes never pile them up
         if self.movie:
             self.movie.stop()
-        self.movie = QMovie(path)
-        self.movie.frameChanged.connect(self.repaint)
+            self.movie.deleteLater()
+        self.foreground_path = path
+        self.render_cache.clear()
+        self.movie = None
+        if path is None:
+            self.update()
+            return
+        stored = self.animations.frames(path, QSize(*EFFECT_SIZE)) if self.animations else None
+        self.movie = FrameAnimation(*stored, parent=self) if stored else QMovie(path, parent=self)
+        # Frame changes go through the governor, which coalesces them into capped update()s
+        self.movie.frameChanged.connect(self.governor.frame_ready)
         self.movie.start()
+        if not self.governor.animating:
+            self.movie.setPaused(True)
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
+    def resizeEvent(self, event):
+        # Cached frames are window sized, anything else is useless now
+        self.render_cache.clear()
+        self.resize_timer.start()
+        super().resizeEvent(event)
 
-        # draw background
-        if not self.background.isNull():
-            painter.drawPixmap(self.rect(), self.background)
+    # Re-decode the background at the new size once resizing settles
+    def reload_background(self):
+        if self.wanted_background:
+            self.update_background(self.wanted_background)
 
-        # draw foreground frame (GIF)
-        if self.movie:
-            frame = self.movie.currentPixmap()
-            if not frame.isNull():
-                scaled = frame.scaled(self.rect().size(), 
-                                    Qt.AspectRatioMode.IgnoreAspectRatio,
-                                    Qt.TransformationMode.SmoothTransformation)
-                painter.drawPixmap(0, 0, scaled)
+    def paintEvent(self, event):
+        if not self._painted:
+            self._painted = True
+            self.profiler.end("first paint")
+
+        started = self.frame_timer.start()
+        painter = QPainter(self)
+        size = self.size()
+        dpr = self.devicePixelRatioF()
+
+        # draw background + foreground frame (GIF) from pre-scaled, pre-composited cache
+        frame = self.movie.currentImage() if self.movie else None
+        if frame is not None and not frame.isNull():
+            self.render_cache.draw_frame(painter, self.background_path, self.background,
+                                         self.foreground_path, self.movie.currentFrameNumber(),
+                                         self.movie.frameCount(), frame, size, dpr)
+        elif not self.background.isNull():
+            painter.drawPixmap(0, 0, self.render_cache.background(self.background_path, self.background, size, dpr))
+
+        painter.end()
+        self.frame_timer.stop(started)
     
     # City Dropdown Search
     def list_cities(self):
@@ -349,25 +655,29 @@ class LofiWeatherApp(QMainWindow):
             QMessageBox.information(self, "Error", "City name empty, please enter a valid city")
             return
 
-        # Query the 2.5 API to check if location is valid
-        geo = self.api.session.get(self.api.geo_url, params = {"q": city, "limit": 10, "appid": API_Key},).json()
+        # Cached searches show instantly, misses are looked up in the background
+        geo = self.geo_cache.get(city)
+        if geo is None:
+            self.fetcher.geocode(city)
+            return
+        self.show_cities(city, geo)
+
+    def places_found(self, query, geo):
         if not geo:
             QMessageBox.information(self, "Error", "No matching locations found.")
             return
+        self.places.add_many(geo)
 
-        # Build formatted dropdown list
-        cities = []
-        for g in geo:
-            name = g.get("name", "")
-            country = g.get("country", "")
-            state = g.get("state", "")
-
-            if state:
-                display = f"{name}, {state}, {country}"
-            else:
-                display = f"{name}, {country}"
+        # Ignore answers for a search the user has already typed over
+        if self.location_dropdown.currentText().strip() == query:
+            self.show_cities(query, geo)
 
-            cities.append(display)
+    def places_search_failed(self, query, message):
+        QMessageBox.information(self, "Error", f"Location search failed: {message}")
+
+    def show_cities(self, city, geo):
+        # Build formatted dropdown list
+        cities = [format_place(g) for g in geo]
 
         # Store results for later selection
         self._last_geo_results = geo
@@ -383,14 +693,33 @@ class LofiWeatherApp(QMainWindow):
         # Open the list so user chooses an option
         self.location_dropdown.showPopup()
 
+    # Typeahead from the local prefix index
+    def update_suggestions(self):
+        text = self.location_dropdown.currentText().strip()
+        matches = self.places.search(text) if text else []
+        self._suggestions = {format_place(g): g for g in matches}
+        self.suggestion_model.setStringList(list(self._suggestions))
+        if matches:
+            self.completer.complete()
+
+    def select_suggestion(self, text):
+        geo = self._suggestions.get(text)
+        if geo:
+            self.set_city(geo, text)
+
     def select_city(self, index):
         if not self._last_geo_results:
             return
 
         geo = self._last_geo_results[index]
-        self.api.lat = geo["lat"]
-        self.api.lon = geo["lon"]
-        self.api.city = self.location_dropdown.currentText()
+        self.set_city(geo, self.location_dropdown.currentText())
+
+    def set_city(self, geo, name, source="user"):
+        self.api.location = Location(name, geo["lat"], geo["lon"])
+
+        # Remembered so the next start up can paint this location immediately
+        self.location_source = source
+        save_last_location(self.last_location_file, name, geo["lat"], geo["lon"], source)
 
         self.update_weather()
 
@@ -422,6 +751,12 @@ class LofiWeatherApp(QMainWindow):
         self.condition_label_1.setFont(font3)
         self.condition_label_1.setStyleSheet("color: white;")
 
+        # Today vs yesterday, filled in from the local history
+        self.trend_label_1 = QLabel("")
+        self.trend_label_1.setFont(QFont("Arial", 11))
+        self.trend_label_1.setStyleSheet("color: white;")
+        self.trend_label_1.hide()
+
         # Metrics container
         metric_container = QWidget() 
         metric_container.setStyleSheet("background: transparent;")
@@ -441,6 +776,7 @@ class LofiWeatherApp(QMainWindow):
         layout.addWidget(self.date_label_1)
         layout.addWidget(self.temp_label_1)
         layout.addWidget(self.condition_label_1)
+        layout.addWidget(self.trend_label_1)
         layout.addWidget(metric_container, stretch=0)
 
         metric_container.setSizePolicy(QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed)
@@ -459,220 +795,192 @@ class LofiWeatherApp(QMainWindow):
         return container
     
     # WEEKLY FORECAST
+    # Day tiles are painted by a delegate from a row model, no widgets per tile
     def build_weekly_table(self):
-        wrapper = QWidget()
-        wrapper.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
-
-        self.week_grid = QGridLayout(wrapper)
-        self.week_grid.setSpacing(5)
-        self.week_grid.setContentsMargins(0, 0, 0, 0)
-
-        # Store day tiles for later update
-        self.weekly_tiles = []
-
-        for i in range(8):
-            # Labels for day / icon / min-max temp
-            day_lbl = QLabel("")
-            day_lbl.setStyleSheet("color:white; font-size:12px; font-weight:bold;")
-            day_lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            
-            cond_icon = QLabel()
-            cond_icon.setFixedSize(48, 48)
-            cond_icon.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
-
-            temp_lbl = QLabel("")
-            temp_lbl.setStyleSheet("color:white; font-size:12px;")
-            temp_lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-            # Store references for updating
-            tile = {
-                "block": ClickableWidget(),
-                "day": day_lbl,
-                "icon": cond_icon,
-                "temp": temp_lbl,
-                "movie": None,
-                "date_key": None
-            }
+        self.weekly_model = RowModel(self)
+        self.weekly_view = WeeklyView(self.weekly_model, self.icon_pool)
+        self.weekly_view.clicked.connect(lambda index: self.update_hourly_panel(index.data(RowRole)[3]))
+        return self.weekly_view
 
-            tile["block"].setStyleSheet("""
-                background: rgba(100,100,100,70);
-                border: 1px solid rgba(255, 255, 255,100);
-                border-radius: 14px;
-                padding: 6px;
-                backdrop-filter: blur(20px);                            
-            
-            """)
-
-            # ----- Vertical block for the day -----
-            v = QVBoxLayout(tile["block"])
-            v.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            v.addWidget(day_lbl)
-            v.addWidget(cond_icon)
-            v.addWidget(temp_lbl)
-
-            self.week_grid.addWidget(tile["block"], 0, i)
-            self.weekly_tiles.append(tile)
-
-            # clickable callback assigned later in update
-            tile["block"].clicked = lambda: None
-        
-        return wrapper
-
-    # Update weekly tiles with data
+    # Update weekly tiles with data, only tiles whose values changed are repainted
     def update_weekly_table(self):
-        days = list(self.daily_data.items())[:8]
-
-        for i, (date_key, entries) in enumerate(days):
-            tile = self.weekly_tiles[i]
-
-            # Update date key and day label
-            tile["date_key"] = date_key
+        rows = []
+        for date_key, summary in list(self.bundle.summary.items())[:8]:
             d = datetime.strptime(date_key, "%Y-%m-%d")
-            tile["day"].setText(d.strftime("%a"))
-           
-            # Most Common Weather Condition icon selection
-            icons = [e["weather"][0]["icon"] for e in entries]
-            icon_code = Counter(icons).most_common(1)[0][0]
-            gif_path = ICON_MAP.get(icon_code, get_asset("icons/clear_d.gif"))
 
-            movie = QMovie(gif_path)
-            movie.setScaledSize(tile["icon"].size())
-            tile["icon"].setMovie(movie)
-            movie.start()
-            tile["movie"] = movie
+            # Most Common Weather Condition icon selection
+            gif_path = ICON_MAP.get(summary["icon"], get_asset("icons/clear_d.gif"))
 
-            # Min/Max Temps
-            temps = [e["main"]["temp"] for e in entries]
-            min_temp = min(temps)
-            max_temp = max(temps)
-            tile["temp"].setText(f"{min_temp:.0f}°C / {max_temp:.0f}°C")
+            rows.append((
+                d.strftime("%a"),
+                gif_path,
+                f"{summary['min']:.0f}°C / {summary['max']:.0f}°C",
+                date_key,
+            ))
+        self.widgets_updated += self.weekly_model.set_rows(rows)
 
-            # Clickable callback to update hourly panel
-            tile["block"].clicked = lambda key=date_key: self.update_hourly_panel(key)
-        
-        # Hide unused tiles (if less than 6 days)
-        for j in range(i + 1, len(self.weekly_tiles)):
-            self.weekly_tiles[j]["block"].hide()
-            
-    # Hourly forecast panel
+    # Hourly forecast panel, a list view that only paints the rows in view
     def build_hourly_panel(self):
-        # Scroll area for hourly entries
-        self.hourly_scroll = QScrollArea()
-        self.hourly_scroll.setWidgetResizable(True)
-        self.hourly_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.hourly_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        self.hourly_scroll.setStyleSheet("background: transparent; border: none;")
-
-        self.hourly_container = QWidget()
-        self.hourly_layout = QVBoxLayout(self.hourly_container)
-        self.hourly_layout.setContentsMargins(0, 0, 0, 0)
-        self.hourly_layout.setSpacing(0)
-
-        self.hourly_scroll.setWidget(self.hourly_container)
-        self.hourly_scroll.setStyleSheet("""
-        QScrollArea {
-            background: transparent;
-            border: none;
-        }
-        QWidget {
-            background: rgba(100,100,100,70);
-            border-radius: 14px;
-            border: 1px solid rgba(255,255,255,80);
-            backdrop-filter: blur(20px);                                 
-        }                         
-        """)
-
-        # pre-create row widgets (max 24 entries)
-        self.hour_rows = []
-        self.max_rows = 24
-
-        for i in range(self.max_rows):
-            # Hourly entry row
-            row = QWidget()
-            grid = QGridLayout(row)
-            grid.setContentsMargins(0, 0, 0, 0) 
-            grid.setHorizontalSpacing(0)          
-            grid.setVerticalSpacing(0) 
-
-            # Labels for time / icon / humidity / temp
-            hour_lbl = QLabel("")
-            hour_lbl.setStyleSheet("color:white; font-size:13px; font-weight:bold;")
-
-            cond_icon = QLabel()
-            cond_icon.setFixedSize(40, 40)
-
-            humidity_lbl = QLabel("")
-            humidity_lbl.setStyleSheet("color:white; font-size:13px;")
-
-            temp_lbl = QLabel("")
-            temp_lbl.setStyleSheet("color:white; font-size:14px; font-weight:bold;")
-
-            # Equal column weighting
-            grid.setColumnStretch(0, 1)  # time
-            grid.setColumnStretch(1, 1)  # icon
-            grid.setColumnStretch(2, 1)  # humidity
-            grid.setColumnStretch(3, 1)  # temp
-
-            grid.addWidget(hour_lbl,     0, 0, alignment=Qt.AlignmentFlag.AlignLeft)
-            grid.addWidget(cond_icon,    0, 1, alignment=Qt.AlignmentFlag.AlignCenter)
-            grid.addWidget(humidity_lbl, 0, 2, alignment=Qt.AlignmentFlag.AlignCenter)
-            grid.addWidget(temp_lbl,     0, 3, alignment=Qt.AlignmentFlag.AlignRight)
-
-            self.hourly_layout.addWidget(row)
-
-            # Store references so we can update them later
-            self.hour_rows.append({
-                "row": row,
-                "hour": hour_lbl,
-                "icon": cond_icon,
-                "humidity": humidity_lbl,
-                "temp": temp_lbl,
-                "movie": None,
-            })
-
-        self.hourly_layout.addStretch()
-        return self.hourly_scroll
-
-    # Update hourly panel for a given day
-    def update_hourly_panel(self, date):
-        hourly = self.daily_data[date]
-
-        for i, entry in enumerate(hourly):
-            row = self.hour_rows[i]
-
-            # Time range
-            dt = datetime.fromtimestamp(entry["dt"], timezone.utc)
+        self.hourly_model = RowModel(self)
+        self.hourly_view = HourlyView(self.hourly_model, self.icon_pool)
+        return self.hourly_view
+
+    # Formatted rows for one day, built once per forecast and reused on every click
+    def hourly_rows(self, date):
+        rows = self._hourly_rows.get(date)
+        if rows is not None:
+            return rows
+
+        local_tz = self.bundle.series.local_tz()
+        rows = []
+        # Days only known from a provider's daily outlook have no slots
+        for entry in self.daily_data.get(date, []):
+            # Time range (city local time, matching how days are grouped)
+            dt = datetime.fromtimestamp(entry["dt"], local_tz)
             dt_end = dt + timedelta(hours=3)
             hour_start = dt.strftime("%H:%M")
             hour_end   = dt_end.strftime("%H:%M")
-            row["hour"].setText(f"{hour_start} - {hour_end}")
 
             # Icon (GIF)
             icon_code = entry["weather"][0]["icon"]
             gif_path = ICON_MAP.get(icon_code, get_asset("icons/clear_d.gif"))
 
-            movie = QMovie(gif_path)
-            movie.setScaledSize(row["icon"].size())
-            row["icon"].setMovie(movie)
-            movie.start()
-            row["movie"] = movie
+            rows.append((
+                f"{hour_start} - {hour_end}",
+                gif_path,
+                f"{entry['main']['humidity']}%",
+                f"{entry['main']['temp']:.0f}°C",
+            ))
+        self._hourly_rows[date] = rows
+        return rows
 
-            # Humidity
-            row["humidity"].setText(f"{entry['main']['humidity']}%")
-
-            # Temperature
-            row["temp"].setText(f"{entry['main']['temp']:.0f}°C")                       
-
-            row["row"].show()
+    # Update hourly panel for a given day
+    @traced("ui.hourly_panel")
+    def update_hourly_panel(self, date):
+        self.widgets_updated += self.hourly_model.set_rows(self.hourly_rows(date))
 
-            # Hide unused rows
-            for j in range(len(hourly), self.max_rows):
-                self.hour_rows[j]["row"].hide()
-        
+    # Kick off a background refresh, apply_weather runs when data is ready
     def update_weather(self):
-        data = self.api.get_current_weather()
-
-        dt = datetime.fromtimestamp(data["dt"], timezone.utc)
+        self.stall_monitor.start()
+        self.fetcher.fetch(self.api.current_location())
+
+    # WATCHED CITIES
+    def build_watch_strip(self):
+        self.watch_strip = QWidget()
+        self.watch_strip.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        self.watch_layout = QHBoxLayout(self.watch_strip)
+        self.watch_layout.setContentsMargins(0, 0, 0, 0)
+        self.watch_layout.setSpacing(5)
+        self.watch_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        self.watch_chips = {}   # Location -> (chip, label)
+        self.watch_strip.setVisible(bool(self.watch_list))
+        return self.watch_strip
+
+    def watch_locations(self):
+        return [Location(w["name"], w["lat"], w["lon"]) for w in self.watch_list]
+
+    # All watched cities in one concurrent batch
+    def refresh_watch_list(self):
+        self.fetcher.fetch_many(self.watch_locations())
+
+    def toggle_watch(self):
+        here = self.api.current_location()
+        kept = [w for w in self.watch_list
+                if (round(w["lat"], 2), round(w["lon"], 2)) != (round(here.lat, 2), round(here.lon, 2))]
+        if len(kept) == len(self.watch_list):
+            kept.append({"name": here.name.split(",")[0], "lat": here.lat, "lon": here.lon})
+        self.watch_list = kept
+        save_watch_list(self.watch_list_file, self.watch_list)
+        self.watch_strip.setVisible(bool(self.watch_list))
+        self.update_watch_strip({})
+        self.refresh_watch_list()
+
+    # Chips stay keyed by Location: a batch only changes the text of chips
+    # whose temperature changed, chips are added/removed with the watch list
+    def update_watch_strip(self, results):
+        locations = self.watch_locations()
+        for loc in [loc for loc in self.watch_chips if loc not in locations]:
+            chip, _ = self.watch_chips.pop(loc)
+            chip.deleteLater()
+            self._rendered.pop(("watch", loc), None)
+
+        for loc in locations:
+            if loc not in self.watch_chips:
+                self.watch_chips[loc] = self.build_watch_chip(loc)
+            bundle = results.get(loc)
+            if isinstance(bundle, WeatherBundle):
+                _, label = self.watch_chips[loc]
+                self.render(("watch", loc), f"{loc.name} {bundle.current['main']['temp']:.0f}°C", label.setText)
+
+    def build_watch_chip(self, loc):
+        chip = ClickableWidget()
+        chip.setStyleSheet("""
+            background: rgba(100,100,100,70);
+            border: 1px solid rgba(255,255,255,100);
+            border-radius: 10px;
+        """)
+        box = QHBoxLayout(chip)
+        box.setContentsMargins(8, 2, 8, 2)
+        label = QLabel(f"{loc.name} --")
+        label.setStyleSheet("color:white; font-size:12px; font-weight:bold; border:none; background:transparent;")
+        box.addWidget(label)
+        chip.clicked = lambda: self.set_city({"lat": loc.lat, "lon": loc.lon}, loc.name)
+        self.watch_layout.addWidget(chip)
+        return chip, label
+
+    def weather_failed(self, message):
+        self.stall_monitor.stop()
+        self.profiler.end("first weather")
+        self.scheduler.failure()
+        metrics.count("weather.failures")
+        print(f"Weather update failed: {message}", file=sys.stderr)
+
+    # Set a widget value only when it differs from what is already on screen
+    def render(self, key, value, apply):
+        if key in self._rendered and self._rendered[key] == value:
+            return
+        self._rendered[key] = value
+        apply(value)
+        self.widgets_updated += 1
+
+    @traced("ui.update")
+    def apply_weather(self, bundle):
+        metrics.count("weather.refreshes")
+        self.scheduler.success(bundle.current["dt"])
+        self.widgets_updated = 0
+
+        # Identical payloads (cache hits, unchanged observations) touch nothing
+        if bundle.digest != self._last_digest:
+            self._last_digest = bundle.digest
+            self.bundle = bundle
+            self.render_current(bundle.current)
+
+            # Cache daily forecast, formatted hourly rows are rebuilt lazily
+            self.daily_data = bundle.daily
+            self._hourly_rows = {}
+
+            # Update weekly weather table and hourly panel
+            self.update_weekly_table()
+
+            # Default hourly = first day available
+            first_day = list(self.daily_data.keys())[0]
+            self.update_hourly_panel(first_day)
+
+            if self.history:
+                self.runner.run(lambda: self.record_history(bundle), self.show_trend)
+
+        # Widgets changed by this refresh
+        self.last_update_count = self.widgets_updated
+
+        self.profiler.end("first weather")
+        self.stall_monitor.stop()
+        if not self.stall_monitor.within_budget():
+            print(f"Refresh stalled the UI for {self.stall_monitor.max_stall_ms} ms "
+                  f"(budget {self.stall_monitor.budget_ms} ms)", file=sys.stderr)
+
+    def render_current(self, data):
+        local_tz = timezone(timedelta(seconds=data.get("timezone", 0)))
+        dt = datetime.fromtimestamp(data["dt"], local_tz)
         date_str = dt.strftime("%A - %B %d")
         temp = data["main"]["temp"]
         condition = data["weather"][0]["main"].lower()
@@ -682,29 +990,80 @@ class LofiWeatherApp(QMainWindow):
         wind = data.get("wind", {}).get("speed", "-")
 
         # Date label
-        self.date_label_1.setText(f"{date_str}")
+        self.render("date", f"{date_str}", self.date_label_1.setText)
         # Temp label
-        self.temp_label_1.setText(f"{temp:.1f}°C")
+        self.render("temp", f"{temp:.1f}°C", self.temp_label_1.setText)
         # Condition label
-        self.condition_label_1.setText(f"{desc}")
+        self.render("condition", f"{desc}", self.condition_label_1.setText)
         # Metrics
-        self.humidity_widget_1.set_value(f"{humidity}%")
-        self.wind_widget_1.set_value(f"{wind}m/s")
+        self.render("humidity", f"{humidity}%", self.humidity_widget_1.set_value)
+        self.render("wind", f"{wind}m/s", self.wind_widget_1.set_value)
         
-        # Update background and music
-        self.set_scene(condition, icon)
+        # Update background and music, only when the scene itself changes
+        self.render("scene", (condition, icon), lambda scene: self.set_scene(*scene))
 
-        # Cache daily forecast
-        self.daily_data = self.api.get_daily_forecast()
+    # Worker thread: store the refresh, then compare with yesterday locally
+    def record_history(self, bundle):
+        self.history.record(bundle)
+        return self.history.yesterday_vs_today(bundle.location, bundle.current.get("timezone", 0))
 
-        # Update weekly weather table and hourly panel
-        self.update_weekly_table()
+    def show_trend(self, comparison):
+        if comparison is None:
+            self.trend_label_1.hide()
+            return
+        delta = comparison["delta"]
+        if abs(delta) < 0.5:
+            text = "About the same as yesterday"
+        else:
+            text = f"{abs(delta):.1f}°C {'warmer' if delta > 0 else 'colder'} than yesterday"
+        self.render("trend", text, self.trend_label_1.setText)
+        self.trend_label_1.show()
 
-        # Default hourly = first day available
-        first_day = list(self.daily_data.keys())[0]
-        self.update_hourly_panel(first_day)
+    def apply_render_mode(self, mode):
+        animate = mode == FULL
+        if self.movie:
+            self.movie.setPaused(not animate)
+        if animate:
+            self.icon_pool.resume()
+        else:
+            self.icon_pool.pause()
+
+    # No polling or animating while minimized or hidden, one catch-up refresh on return
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.WindowStateChange:
+            if self.isMinimized():
+                self.scheduler.pause()
+                self.governor.set_visible(False)
+            elif self.isVisible():
+                self.scheduler.resume()
+                self.governor.set_visible(True)
+        super().changeEvent(event)
+
+    def hideEvent(self, event):
+        self.scheduler.pause()
+        self.governor.set_visible(False)
+        super().hideEvent(event)
+
+    def showEvent(self, event):
+        if not self.isMinimized():
+            self.scheduler.resume()
+            self.governor.set_visible(True)
+        super().showEvent(event)
+
+    def closeEvent(self, event):
+        self.governor.stop()
+        self.fetcher.shutdown()
+        self.bg_loader.shutdown()
+        self.icon_pool.shutdown()
+        self.audio.shutdown()
+        if self.history:
+            self.history.close()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        super().closeEvent(event)
 
     # Select background, forground and music based on condition
+    @traced("ui.set_scene")
     def set_scene(self, condition, icon):
         condition = condition.lower()
         is_night = icon.endswith("n")
@@ -774,30 +1133,68 @@ class LofiWeatherApp(QMainWindow):
                 music_key = "clear"
 
         if music_key is not None and music_key in MUSIC_MAP:
-            music_path = random.choice(MUSIC_MAP[music_key])
+            # Use the track picked (and pre-decoded) last time for this group
+            music_path = self.next_tracks.pop(music_key, None) or random.choice(MUSIC_MAP[music_key])
 
         # Update UI
         self.update_background(bg_path)
         self.update_foreground(fg_path)
 
+        # Preload the other half of the day/night pair so the flip is instant
+        other_dn = "d" if is_night else "n"
+        self.bg_loader.preload([get_asset(f"backgrounds/{root}_{other_dn}.jpg")], self.background_pixel_size())
+
         # Music playback
-        if getattr(self, "music", None) != music_path:
-            pygame.mixer.music.load(music_path)
-            pygame.mixer.music.play(-1)
+        # Only remembered once the audio engine took the command, so a scene
+        # that could not start its music tries again next time
+        if getattr(self, "music", None) != music_path and self.play_music(music_path):
             self.music = music_path
 
+        # Pick the next track for this group now so the audio process can decode it early
+        if music_key in MUSIC_MAP and music_key not in self.next_tracks:
+            track = random.choice(MUSIC_MAP[music_key])
+            if self.audio.preload(track):
+                self.next_tracks[music_key] = track
+
+    # First track starts straight away, later changes crossfade
+    def play_music(self, music_path):
+        if self.audio_started_once:
+            return self.audio.crossfade(music_path)
+        self.audio_started_once = self.audio.play(music_path)
+        return self.audio_started_once
+
     def toggle_music(self):
-        if pygame.mixer.music.get_busy():
-            pygame.mixer.music.pause()
-        else:
-            pygame.mixer.music.unpause()
+        self.audio.toggle()
     
 
 # -------------------------------------------------------------
 # RUN APPLICATION
 # -------------------------------------------------------------
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = LofiWeatherApp()
+    parser = argparse.ArgumentParser(description="The weather lounge")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print how long each start up phase took")
+    parser.add_argument("--metrics", action="store_true",
+                        help="record timings and serve them on localhost (/metrics, /metrics.json)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", action="store_true",
+                      help="also store every API response in the offline archive")
+    mode.add_argument("--replay", action="store_true",
+                      help="serve API responses from the offline archive, no network access")
+    args, qt_args = parser.parse_known_args()
+
+    if args.metrics:
+        config["metrics"] = {**config.get("metrics", {}), "enabled": True}
+    if args.record or args.replay:
+        config["http"] = {**config.get("http", {}), "mode": "replay" if args.replay else "record"}
+
+    profiler = StartupProfiler(t0=STARTUP_T0, enabled=args.startup_profile)
+    profiler.record("imports", STARTUP_T0)
+
+    profiler.begin("qt init")
+    app = QApplication(sys.argv[:1] + qt_args)
+    profiler.end("qt init")
+
+    window = LofiWeatherApp(profiler)
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
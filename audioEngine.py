@@ -0,0 +1,267 @@
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+from metrics import metrics
+
+log = logging.getLogger(__name__)
+
+CROSSFADE_MS = 2000
+
+# Frozen builds have no separate script to run, the executable itself starts
+# the worker when given this flag
+WORKER_FLAG = "--audio-worker"
+
+# -------------------------------------------------------------
+# AUDIO WORKER (runs in its own process)
+# -------------------------------------------------------------
+# Tracks are decoded fully into pygame Sounds so preloading really means the
+# MP3 work is done before the track is needed. Two sounds overlap during a
+# crossfade, and a couple more may be preloaded, hence the small LRU.
+class Player:
+
+    def __init__(self, pygame, max_sounds=3, events=None):
+        self.pygame = pygame
+        # Decode times are reported back to the GUI process's metrics
+        self.events = events
+        self.max_sounds = max_sounds
+        self.sounds = OrderedDict()
+        self.channel = None
+        self.current = None
+        self.paused = False
+        self.level = 1.0
+
+    def _sound(self, path):
+        sound = self.sounds.get(path)
+        if sound is not None:
+            self.sounds.move_to_end(path)
+            return sound
+
+        started = time.perf_counter()
+        sound = self.pygame.mixer.Sound(path)
+        if self.events is not None:
+            self.events.put(("timing", ("audio.load", (time.perf_counter() - started) * 1000)))
+        self.sounds[path] = sound
+        for old in list(self.sounds):
+            if len(self.sounds) <= self.max_sounds:
+                break
+            if old not in (path, self.current):
+                del self.sounds[old]
+        return sound
+
+    def preload(self, path):
+        self._sound(path)
+
+    def play(self, path):
+        self.crossfade(path, 0)
+
+    def crossfade(self, path, ms):
+        sound = self._sound(path)
+        if self.channel is not None:
+            if ms:
+                self.channel.fadeout(ms)
+            else:
+                self.channel.stop()
+
+        self.channel = sound.play(loops=-1, fade_ms=ms)
+        if self.channel is not None:
+            self.channel.set_volume(self.level)
+        self.current = path
+        if self.paused:
+            self.pygame.mixer.pause()
+
+    def pause(self):
+        self.pygame.mixer.pause()
+        self.paused = True
+
+    def resume(self):
+        self.pygame.mixer.unpause()
+        self.paused = False
+
+    def toggle(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def volume(self, level):
+        self.level = max(0.0, min(1.0, level))
+        if self.channel is not None:
+            self.channel.set_volume(self.level)
+
+
+# Worker side of the pipe protocol: one JSON array per line on stdin
+# (["crossfade", path, ms]), events back as JSON arrays on the original stdout.
+# Anything pygame or SDL print goes to stderr instead, so it cannot corrupt
+# the event stream.
+def run_worker(commands=None):
+    commands = commands or sys.stdin
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1, encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    class Events:
+        def put(self, event):
+            out.write(json.dumps(event) + "\n")
+
+    events = Events()
+    try:
+        import pygame
+        pygame.mixer.init()
+    except Exception as e:
+        events.put(("error", f"init: {e}"))
+        return 1
+    events.put(("ready", None))
+
+    player = Player(pygame, events=events)
+    for line in commands:
+        name, *args = json.loads(line)
+        if name == "quit":
+            break
+        try:
+            getattr(player, name)(*args)
+        except Exception as e:
+            events.put(("error", f"{name}: {e}"))
+
+    pygame.mixer.quit()
+    return 0
+
+
+# -------------------------------------------------------------
+# AUDIO ENGINE (GUI side)
+# -------------------------------------------------------------
+# Handle to the audio process. It is started from this small module (or,
+# in frozen builds, from the executable with --audio-worker before anything
+# heavy is imported), so it never loads Qt, numpy or the app's config.
+# Every method only writes a short line to a pipe, so nothing here ever
+# blocks the GUI thread on audio work. Commands sent before start() are held
+# and written as soon as the process exists.
+class AudioEngine:
+
+    def __init__(self):
+        self.process = None
+        self.events = queue.Queue()
+        self.pending = []
+        # Set once the worker reported ready, or failed before getting there
+        self.ready = threading.Event()
+        self.error = None
+        self.failed = False
+
+    @staticmethod
+    def command():
+        if getattr(sys, "frozen", False):
+            return [sys.executable, WORKER_FLAG]
+        return [sys.executable, os.path.abspath(__file__)]
+
+    def start(self):
+        env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+        self.process = subprocess.Popen(self.command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        env=env, text=True, encoding="utf-8", bufsize=1)
+        threading.Thread(target=self._read_events, name="weather-audio-events", daemon=True).start()
+        pending, self.pending = self.pending, []
+        for line in pending:
+            self._write(line)
+
+    # Pipe -> queue for _drain. Readiness goes to its own event so a _drain on
+    # the GUI thread can never swallow it.
+    def _read_events(self):
+        for line in self.process.stdout:
+            try:
+                kind, message = json.loads(line)
+            except ValueError:
+                continue
+            if kind == "ready":
+                self.ready.set()
+            elif kind == "error" and not self.ready.is_set():
+                self.error = message
+                self.ready.set()
+            else:
+                self.events.put((kind, message))
+        if not self.ready.is_set():
+            self.error = "audio process exited"
+            self.ready.set()
+        self.events.put(("error", "audio process exited"))
+
+    # Blocks until the worker has pygame up, run this off the GUI thread
+    def wait_ready(self, timeout=15):
+        if not self.ready.wait(timeout):
+            self.failed = True
+            raise RuntimeError(f"audio process not ready after {timeout}s")
+        if self.error is not None:
+            self.failed = True
+            raise RuntimeError(self.error)
+        return self
+
+    # True when the command was written or is held until start()
+    def send(self, name, *args):
+        self._drain()
+        if self.failed:
+            return False
+        line = json.dumps([name, *args]) + "\n"
+        if self.process is None:
+            self.pending.append(line)
+            return True
+        return self._write(line)
+
+    def _write(self, line):
+        try:
+            self.process.stdin.write(line)
+        except (OSError, ValueError) as e:
+            log.warning("Audio process gone: %s", e)
+            self.failed = True
+            return False
+        return True
+
+    # Report errors from the worker (missing files etc.) without waiting
+    def _drain(self):
+        while True:
+            try:
+                kind, message = self.events.get_nowait()
+            except queue.Empty:
+                return
+            if kind == "error":
+                log.warning("Audio: %s", message)
+            elif kind == "timing":
+                metrics.observe(*message)
+
+    def play(self, path):
+        return self.send("play", path)
+
+    def crossfade(self, path, ms=CROSSFADE_MS):
+        return self.send("crossfade", path, ms)
+
+    def preload(self, path):
+        return self.send("preload", path)
+
+    def pause(self):
+        self.send("pause")
+
+    def resume(self):
+        self.send("resume")
+
+    def toggle(self):
+        self.send("toggle")
+
+    def volume(self, level):
+        self.send("volume", level)
+
+    def shutdown(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        try:
+            self.process.stdin.write(json.dumps(["quit"]) + "\n")
+            self.process.stdin.close()
+        except (OSError, ValueError):
+            pass
+        try:
+            self.process.wait(1)
+        except subprocess.TimeoutExpired:
+            self.process.terminate()
+
+
+if __name__ == "__main__":
+    sys.exit(run_worker())
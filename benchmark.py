@@ -0,0 +1,462 @@
+import time
+BENCH_T0 = time.perf_counter()
+import os
+import sys
+import json
+import random
+import argparse
+import itertools
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BASE_DIR, "fixtures", "openweather")
+FORECAST_SLOT = 3 * 60 * 60
+
+# Path the fake server answers -> fixture name
+ROUTES = {
+    "/data/2.5/weather": "weather",
+    "/data/2.5/forecast": "forecast",
+    "/geo/1.0/direct": "geo",
+}
+
+# Never let the benchmark's own quota limiter be what we measure
+FAST_HTTP = {"rate_per_minute": 1_000_000, "burst": 1_000_000, "backoff": 0.01, "max_backoff": 0.1}
+
+# Upstream calls one uncached refresh may cost with the default 2.5 provider
+REFRESH_CALLS = {"weather": 1, "forecast": 1}
+
+# -------------------------------------------------------------
+# FIXTURES
+# -------------------------------------------------------------
+# Recorded London responses. Timestamps are moved so the forecast starts at
+# the next 3 hour slot, the app then groups days and local times exactly as
+# it would for a live response.
+def load_fixtures(path=FIXTURE_DIR, now=None):
+    fixtures = {}
+    for name in ROUTES.values():
+        with open(os.path.join(path, f"{name}.json"), "r", encoding="utf-8") as f:
+            fixtures[name] = json.load(f)
+
+    now = time.time() if now is None else now
+    entries = fixtures["forecast"]["list"]
+    shift = (int(now) // FORECAST_SLOT + 1) * FORECAST_SLOT - entries[0]["dt"]
+    for entry in entries:
+        entry["dt"] += shift
+        entry["dt_txt"] = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(entry["dt"]))
+    current = fixtures["weather"]
+    current["dt"] += shift
+    for key in ("sunrise", "sunset"):
+        current["sys"][key] += shift
+        fixtures["forecast"]["city"][key] += shift
+    return fixtures
+
+# -------------------------------------------------------------
+# FAKE OPENWEATHER
+# -------------------------------------------------------------
+# Serves the fixtures on the real OpenWeather paths from localhost. Every
+# response waits latency seconds and failure_rate of them are 503s, so the
+# transport's retries are part of what gets measured.
+class FakeOpenWeather:
+
+    def __init__(self, fixtures, latency=0.0, failure_rate=0.0, seed=0, port=0):
+        self.bodies = {name: json.dumps(data).encode("utf-8") for name, data in fixtures.items()}
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.handle(self)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        return Handler
+
+    def handle(self, request):
+        name = ROUTES.get(urlsplit(request.path).path)
+        with self._lock:
+            self.requests += 1
+            fail = self.random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if name is None:
+            status, body = 404, b'{"cod":404,"message":"not found"}'
+        elif fail:
+            status, body = 503, b'{"cod":503,"message":"injected failure"}'
+        else:
+            status, body = 200, self.bodies[name]
+
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever, name="fake-openweather", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+# -------------------------------------------------------------
+# TIMING
+# -------------------------------------------------------------
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "median_ms": statistics.median(ordered),
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "min_ms": ordered[0],
+        "max_ms": ordered[-1],
+    }
+
+def timed(fn, runs, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+# Upstream calls counted between two request_counts snapshots against what
+# that many refreshes should cost, the run fails when they differ
+def check_calls(checks, name, before, after, refreshes):
+    calls = {endpoint: after[endpoint] - before.get(endpoint, 0) for endpoint in after}
+    calls = {endpoint: n for endpoint, n in calls.items() if n}
+    expected = {endpoint: n * refreshes for endpoint, n in REFRESH_CALLS.items() if n * refreshes}
+    checks[name] = {"calls": calls, "expected": expected, "ok": calls == expected}
+
+# -------------------------------------------------------------
+# SUITES
+# -------------------------------------------------------------
+def bench_client(server, runs, checks):
+    from openWeatherMapAPI import OpenWeatherClient, Location
+    from weatherCache import ResponseCache
+    from weatherTransport import Transport
+
+    london = Location("London", 51.5073, -0.1276)
+
+    def client(cache=None):
+        return OpenWeatherClient("bench", "London", cache=cache, lat=london.lat, lon=london.lon,
+                                 transport=Transport(**FAST_HTTP), base_url=server.url)
+
+    uncached = client()
+    cached = client(ResponseCache(tempfile.mkdtemp(prefix="bench-cache-")))
+    results = {
+        "client.get_all_weather": timed(lambda: uncached.get_all_weather(london), runs),
+        "client.get_all_weather.cached": timed(lambda: cached.get_all_weather(london), runs),
+    }
+    # Every uncached refresh (plus the warmup) costs one call per endpoint,
+    # the cached client only pays for its first one
+    if not server.failure_rate:
+        check_calls(checks, "client.get_all_weather", {}, uncached.request_counts, runs + 1)
+        check_calls(checks, "client.get_all_weather.cached", {}, cached.request_counts, 1)
+    results["client.geocode"] = timed(lambda: uncached.geocode("London"), runs)
+    return results
+
+def bench_aggregate(fixtures, runs):
+    from weatherBundle import WeatherBundle
+
+    def aggregate():
+        bundle = WeatherBundle(fixtures["weather"], fixtures["forecast"])
+        bundle.daily
+        bundle.summary
+
+    return {
+        "aggregate.daily_summary": timed(aggregate, runs),
+        "aggregate.digest": timed(lambda: WeatherBundle(fixtures["weather"], fixtures["forecast"]).digest, runs),
+    }
+
+# Point a freshly imported app module at the fake server and a private cache
+def configure_app(app, url, cache_dir):
+    from placeSearch import save_last_location
+
+    app.config.update({"daemon_url": url, "cache_dir": cache_dir, "http": FAST_HTTP})
+    # A city picked by hand, so start up never does an IP lookup
+    save_last_location(os.path.join(cache_dir, "last_location.json"), "London", 51.5073, -0.1276, "user")
+
+# Spin the event loop until done() or timeout seconds
+def wait_until(done, timeout=30):
+    from PyQt6.QtWidgets import QApplication
+
+    deadline = time.monotonic() + timeout
+    while not done():
+        if time.monotonic() > deadline:
+            raise TimeoutError("benchmark timed out waiting for the app")
+        QApplication.processEvents()
+        time.sleep(0.001)
+
+def bench_qt(server, runs, checks):
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QEventLoop
+    import app
+
+    configure_app(app, server.url, tempfile.mkdtemp(prefix="bench-app-"))
+    qapp = QApplication.instance() or QApplication(sys.argv[:1])
+    window = app.LofiWeatherApp()
+    window.show()
+    wait_until(lambda: hasattr(window, "bundle") and not window.background.isNull())
+
+    def refresh():
+        loop = QEventLoop()
+        window.fetcher.ready.connect(loop.quit)
+        window.fetcher.failed.connect(loop.quit)
+        window.update_weather()
+        loop.exec()
+        window.fetcher.ready.disconnect(loop.quit)
+        window.fetcher.failed.disconnect(loop.quit)
+
+    results = {"update_weather.cached": timed(refresh, runs)}
+
+    # Without the response cache every refresh goes to the server
+    cache, window.api.cache = window.api.cache, None
+    before = dict(window.api.request_counts)
+    results["update_weather"] = timed(refresh, runs)
+    if not server.failure_rate:
+        check_calls(checks, "update_weather", before, window.api.request_counts, runs + 1)
+    window.api.cache = cache
+
+    days = itertools.cycle(list(window.daily_data))
+    def switch_day():
+        window.update_hourly_panel(next(days))
+        window.hourly_view.viewport().repaint()
+    results["update_hourly_panel"] = timed(switch_day, runs)
+
+    # Time spent inside paintEvent only, stepping the foreground GIF each frame
+    frames = []
+    for _ in range(runs):
+        if window.movie:
+            window.movie.jumpToNextFrame()
+        before = window.frame_timer.total_ms
+        window.repaint()
+        frames.append(window.frame_timer.total_ms - before)
+    results["paintEvent"] = summarize(frames)
+
+    window.close()
+    qapp.processEvents()
+    return results
+
+# CPU time (ms of CPU per wall second) used by a window just sitting there,
+# animating, held static and hidden. Audio runs in its own process and is
+# not counted.
+def bench_idle(server, seconds):
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QEventLoop, QTimer
+    from renderGovernor import STATIC
+    import app
+
+    configure_app(app, server.url, tempfile.mkdtemp(prefix="bench-idle-"))
+    qapp = QApplication.instance() or QApplication(sys.argv[:1])
+    window = app.LofiWeatherApp()
+    window.show()
+    wait_until(lambda: hasattr(window, "bundle") and not window.background.isNull())
+
+    def idle():
+        samples = []
+        for _ in range(seconds):
+            loop = QEventLoop()
+            QTimer.singleShot(1000, loop.quit)
+            started, cpu = time.perf_counter(), time.process_time()
+            loop.exec()
+            samples.append((time.process_time() - cpu) * 1000 / (time.perf_counter() - started))
+        return summarize(samples)
+
+    results = {"idle.animating": idle()}
+    window.governor.force(STATIC)
+    results["idle.static"] = idle()
+    window.governor.force(None)
+    window.hide()
+    results["idle.hidden"] = idle()
+
+    window.close()
+    qapp.processEvents()
+    return results
+
+# Run in a fresh interpreter by bench_startup, prints its phases as JSON
+def startup_child(url, cache_dir):
+    from startupProfile import StartupProfiler
+    import app
+
+    configure_app(app, url, cache_dir)
+    profiler = StartupProfiler(t0=BENCH_T0)
+    profiler.record("imports", BENCH_T0)
+
+    from PyQt6.QtWidgets import QApplication
+    profiler.begin("qt init")
+    qapp = QApplication(sys.argv[:1])
+    profiler.end("qt init")
+
+    window = app.LofiWeatherApp(profiler)
+    window.show()
+    wait_until(lambda: profiler.finished)
+    window.close()
+    qapp.processEvents()
+
+    print(json.dumps({name: {"took_ms": took, "done_at_ms": done_at} for name, took, done_at in profiler.phases}))
+
+# Cold start: new process, empty cache, nothing imported yet. Each cold start
+# is followed by a warm one in the same cache dir, which paints from the
+# cached responses before refreshing (results under startup.warm.*)
+def bench_startup(server, runs):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    took, done_at = {}, {"": [], "warm.": []}
+
+    def start(cache_dir, prefix):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--startup-child", "--url", server.url, "--cache-dir", cache_dir],
+            env=env, capture_output=True, text=True, timeout=120, check=True,
+        )
+        phases = json.loads(out.stdout.strip().splitlines()[-1])
+        for name, phase in phases.items():
+            took.setdefault(prefix + name, []).append(phase["took_ms"])
+        done_at[prefix].append(max(p["done_at_ms"] for p in phases.values()))
+
+    for _ in range(runs):
+        cache_dir = tempfile.mkdtemp(prefix="bench-startup-")
+        start(cache_dir, "")
+        start(cache_dir, "warm.")
+
+    results = {f"startup.{name}": summarize(samples) for name, samples in took.items()}
+    results["startup.total"] = summarize(done_at[""])
+    results["startup.warm.total"] = summarize(done_at["warm."])
+    return results
+
+SUITES = ["client", "aggregate", "qt", "idle", "startup"]
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def run(args):
+    fixtures = load_fixtures()
+    server = FakeOpenWeather(fixtures, latency=args.latency, failure_rate=args.failure_rate, seed=args.seed)
+    server.start()
+
+    results = {}
+    checks = {}
+    try:
+        if "client" in args.suites:
+            results.update(bench_client(server, args.runs, checks))
+        if "aggregate" in args.suites:
+            results.update(bench_aggregate(fixtures, args.runs))
+        if "qt" in args.suites:
+            results.update(bench_qt(server, args.runs, checks))
+        if "idle" in args.suites:
+            results.update(bench_idle(server, args.idle_seconds))
+        if "startup" in args.suites:
+            results.update(bench_startup(server, args.startup_runs))
+    finally:
+        server.stop()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "startup_runs": args.startup_runs,
+            "idle_seconds": args.idle_seconds,
+            "latency_s": args.latency,
+            "failure_rate": args.failure_rate,
+            "server_requests": server.requests,
+            "server_failures": server.failures,
+        },
+        "results": results,
+        "checks": checks,
+    }
+
+# Median change per benchmark against an earlier run, True if nothing regressed
+def compare(report, baseline, threshold):
+    ok = True
+    print(f"{'benchmark':<32}{'before':>10}{'after':>10}{'change':>9}", file=sys.stderr)
+    for name, now in report["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<32}{'-':>10}{now['median_ms']:>10.2f}{'new':>9}", file=sys.stderr)
+            continue
+        change = (now["median_ms"] - before["median_ms"]) / max(before["median_ms"], 1e-9)
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<32}{before['median_ms']:>10.2f}{now['median_ms']:>10.2f}{change:>+9.1%}{flag}", file=sys.stderr)
+        ok = ok and change <= threshold
+    return ok
+
+
+if __name__ == "__main__":
+    # Offscreen Qt and silent audio, before anything imports PyQt or pygame
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    parser = argparse.ArgumentParser(description="Benchmark the weather lounge against a local OpenWeather stand-in")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=SUITES)
+    parser.add_argument("--runs", type=int, default=30, help="timed runs per benchmark")
+    parser.add_argument("--startup-runs", type=int, default=5, help="cold starts to time")
+    parser.add_argument("--idle-seconds", type=int, default=10, help="seconds sampled per idle state")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake server response delay (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON report to compare medians against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="median slowdown counted as a regression")
+    parser.add_argument("--startup-child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.startup_child:
+        startup_child(args.url, args.cache_dir)
+        sys.exit(0)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = [name for name, check in report["checks"].items() if not check["ok"]]
+    for name in failed:
+        check = report["checks"][name]
+        print(f"{name}: upstream calls {check['calls']}, expected {check['expected']}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        sys.exit(0 if compare(report, baseline, args.threshold) and not failed else 1)
+    sys.exit(1 if failed else 0)
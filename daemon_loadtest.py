@@ -0,0 +1,89 @@
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from openWeatherMapAPI import OpenWeatherClient, Location
+from weatherDaemon import WeatherDaemon
+from weatherTransport import Transport
+
+OFFICES = [
+    Location("London", 51.5073, -0.1276),
+    Location("Berlin", 52.5170, 13.3889),
+    Location("Toronto", 43.6535, -79.3839),
+]
+
+# Minimal /weather and /forecast payloads, enough for WeatherBundle
+def synthetic_payload(name, params):
+    now = int(time.time()) // 10800 * 10800
+    if name == "weather":
+        return {"dt": now, "timezone": 0, "main": {"temp": 12.0, "humidity": 70},
+                "weather": [{"main": "Clouds", "description": "broken clouds", "icon": "04d"}],
+                "wind": {"speed": 3.2}}
+    entries = []
+    for i in range(40):
+        dt = now + i * 10800
+        entries.append({"dt": dt, "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(dt)),
+                        "main": {"temp": 10.0 + i % 8, "humidity": 60}, "pop": 0.1,
+                        "wind": {"speed": 2.0}, "weather": [{"icon": "04d"}]})
+    return {"list": entries, "city": {"timezone": 0}}
+
+# Stands in for OpenWeather: counts calls and adds round-trip latency
+class SyntheticUpstream(Transport):
+
+    def __init__(self, latency):
+        super().__init__(rate_per_minute=10_000, burst=10_000)
+        self.latency = latency
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+
+    def get_json(self, name, url, params):
+        with self._calls_lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return synthetic_payload(name, params)
+
+# One round: a fresh daemon and N widgets each refreshing every office at once
+def run_round(clients, latency):
+    upstream = SyntheticUpstream(latency)
+    daemon = WeatherDaemon("unused", port=0, transport=upstream, cache_dir=tempfile.mkdtemp())
+    daemon.start()
+
+    errors = []
+    def widget():
+        client = OpenWeatherClient("unused", "widget", lat=0, lon=0, base_url=daemon.url,
+                                   transport=Transport(rate_per_minute=10_000, burst=10_000))
+        for office in OFFICES:
+            try:
+                client.get_all_weather(office)
+            except Exception as e:
+                errors.append(e)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=widget) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    stats = daemon.stats()
+    daemon.stop()
+    return upstream.calls, stats["served"], len(errors), elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show upstream calls stay flat as widgets are added")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated upstream round-trip (s)")
+    args = parser.parse_args()
+
+    expected = 2 * len(OFFICES)
+    print(f"{'clients':>8}{'upstream':>10}{'served':>8}{'errors':>8}{'seconds':>9}")
+    ok = True
+    for n in args.clients:
+        calls, served, errors, elapsed = run_round(n, args.latency)
+        print(f"{n:>8}{calls:>10}{served:>8}{errors:>8}{elapsed:>9.2f}")
+        ok = ok and calls == expected and errors == 0
+    print(f"upstream calls constant at {expected}: {'yes' if ok else 'NO'}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+# Every icon OpenWeather can send, the index is what ForecastSeries stores
+ICON_CODES = [
+    "01d", "01n", "02d", "02n", "03d", "03n", "04d", "04n", "09d", "09n",
+    "10d", "10n", "11d", "11n", "13d", "13n", "50d", "50n",
+]
+ICON_INDEX = {code: i for i, code in enumerate(ICON_CODES)}
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# -------------------------------------------------------------
+# COLUMNAR FORECAST
+# -------------------------------------------------------------
+# The /forecast list as a handful of NumPy columns instead of 40 nested
+# dicts. Days are bucketed in the city's local time (the payload's timezone
+# offset) and daily min/max/most common icon come out of one vectorized pass.
+class ForecastSeries:
+    __slots__ = ("dt", "temp", "humidity", "pop", "wind", "icon", "tz_offset", "day")
+
+    def __init__(self, dt, temp, humidity, pop, wind, icon, tz_offset=0):
+        self.dt = dt
+        self.temp = temp
+        self.humidity = humidity
+        self.pop = pop
+        self.wind = wind
+        self.icon = icon
+        self.tz_offset = tz_offset
+        # Local day number (days since epoch in the city's timezone)
+        self.day = (dt + tz_offset) // SECONDS_PER_DAY
+
+    @classmethod
+    def from_forecast(cls, forecast):
+        entries = forecast.get("list", [])
+        tz_offset = forecast.get("city", {}).get("timezone", 0)
+        return cls(
+            np.fromiter((e["dt"] for e in entries), dtype=np.int64, count=len(entries)),
+            np.fromiter((e["main"]["temp"] for e in entries), dtype=np.float32, count=len(entries)),
+            np.fromiter((e["main"].get("humidity", 0) for e in entries), dtype=np.uint8, count=len(entries)),
+            np.fromiter((e.get("pop", 0.0) for e in entries), dtype=np.float32, count=len(entries)),
+            np.fromiter((e.get("wind", {}).get("speed", 0.0) for e in entries), dtype=np.float32, count=len(entries)),
+            np.fromiter((ICON_INDEX.get(e["weather"][0]["icon"], 0) for e in entries), dtype=np.uint8, count=len(entries)),
+            tz_offset,
+        )
+
+    def __len__(self):
+        return len(self.dt)
+
+    # "YYYY-MM-DD" for a local day number
+    def date_key(self, day):
+        return (datetime(1970, 1, 1) + timedelta(days=int(day))).strftime("%Y-%m-%d")
+
+    def local_tz(self):
+        return timezone(timedelta(seconds=self.tz_offset))
+
+    # Start index of each day's slots, the list is already sorted by time
+    def day_bounds(self):
+        if not len(self):
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero(np.r_[True, self.day[1:] != self.day[:-1]])
+
+    # {date_key: slice} into the columns (and the original entry list)
+    def day_slices(self):
+        starts = self.day_bounds()
+        ends = np.r_[starts[1:], len(self)]
+        return {self.date_key(self.day[s]): slice(int(s), int(e)) for s, e in zip(starts, ends)}
+
+    # {date_key: {"min", "max", "icon"}} for every day in the series
+    def daily_summary(self):
+        return daily_summaries([self])[0]
+
+
+# Daily min/max/mode for many locations at once: the series are stacked and
+# reduced together, so the cost is one pass however many cities there are.
+def daily_summaries(series_list):
+    non_empty = [s for s in series_list if len(s)]
+    if not non_empty:
+        return [{} for _ in series_list]
+
+    temp = np.concatenate([s.temp for s in non_empty])
+    icon = np.concatenate([s.icon for s in non_empty])
+    owner = np.concatenate([np.full(len(s), i, dtype=np.int64) for i, s in enumerate(non_empty)])
+    day = np.concatenate([s.day for s in non_empty])
+
+    # Group boundaries wherever the (location, day) pair changes
+    change = np.r_[True, (owner[1:] != owner[:-1]) | (day[1:] != day[:-1])]
+    starts = np.flatnonzero(change)
+    group = np.cumsum(change) - 1
+
+    mins = np.minimum.reduceat(temp, starts)
+    maxs = np.maximum.reduceat(temp, starts)
+    counts = np.zeros((len(starts), len(ICON_CODES)), dtype=np.int32)
+    np.add.at(counts, (group, icon), 1)
+    modes = counts.argmax(axis=1)
+
+    summaries = {id(s): {} for s in non_empty}
+    for g, start in enumerate(starts):
+        s = non_empty[owner[start]]
+        summaries[id(s)][s.date_key(day[start])] = {
+            "min": float(mins[g]),
+            "max": float(maxs[g]),
+            "icon": ICON_CODES[modes[g]],
+        }
+    return [summaries.get(id(s), {}) for s in series_list]
@@ -0,0 +1,200 @@
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize
+from PyQt6.QtGui import QColor, QFont, QPainter, QPen
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView, QFrame
+
+# The whole row tuple, delegates unpack it themselves
+RowRole = Qt.ItemDataRole.UserRole
+
+TILE_BG = QColor(100, 100, 100, 70)
+TILE_BORDER = QColor(255, 255, 255, 100)
+TEXT = QColor("white")
+
+# -------------------------------------------------------------
+# ROW MODEL
+# -------------------------------------------------------------
+# List model over plain tuples (one per forecast slot or day). set_rows only
+# signals the rows that actually changed, so views repaint just those.
+class RowModel(QAbstractListModel):
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == RowRole:
+            return row
+        if role == Qt.ItemDataRole.DisplayRole:
+            return row[0]
+        return None
+
+    # Returns how many rows changed
+    def set_rows(self, rows):
+        rows = list(rows)
+        if len(rows) != len(self._rows):
+            self.beginResetModel()
+            self._rows = rows
+            self.endResetModel()
+            return len(rows)
+
+        changed = 0
+        for i, (old, new) in enumerate(zip(self._rows, rows)):
+            if old != new:
+                self._rows[i] = new
+                index = self.index(i)
+                self.dataChanged.emit(index, index)
+                changed += 1
+        return changed
+
+# Shared look of the old styled tiles/rows
+def paint_tile(painter, rect, radius=14):
+    painter.setPen(QPen(TILE_BORDER, 1))
+    painter.setBrush(TILE_BG)
+    painter.drawRoundedRect(rect.adjusted(2, 2, -2, -2), radius, radius)
+
+def make_font(size, bold=False):
+    font = QFont()
+    font.setPixelSize(size)
+    font.setBold(bold)
+    return font
+
+# -------------------------------------------------------------
+# HOURLY DELEGATE
+# -------------------------------------------------------------
+# Paints (time, icon path, humidity, temp) rows in four equal columns.
+# Only rows inside the viewport are ever painted.
+class HourlyDelegate(QStyledItemDelegate):
+    ROW_HEIGHT = 44
+    ICON = QSize(40, 40)
+
+    def __init__(self, icon_pool, parent=None):
+        super().__init__(parent)
+        self.icon_pool = icon_pool
+        self.time_font = make_font(13, bold=True)
+        self.humidity_font = make_font(13)
+        self.temp_font = make_font(14, bold=True)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        hour_text, gif_path, humidity_text, temp_text = index.data(RowRole)
+        rect = option.rect
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        paint_tile(painter, rect)
+
+        col = rect.width() // 4
+        inner = rect.adjusted(10, 0, -10, 0)
+        painter.setPen(TEXT)
+
+        painter.setFont(self.time_font)
+        painter.drawText(QRect(inner.left(), rect.top(), col, rect.height()),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, hour_text)
+
+        frame = self.icon_pool.frame(gif_path, self.ICON)
+        if frame is not None:
+            x = rect.left() + col + (col - self.ICON.width()) // 2
+            y = rect.top() + (rect.height() - self.ICON.height()) // 2
+            painter.drawImage(x, y, frame)
+
+        painter.setFont(self.humidity_font)
+        painter.drawText(QRect(rect.left() + 2 * col, rect.top(), col, rect.height()),
+                         Qt.AlignmentFlag.AlignCenter, humidity_text)
+
+        painter.setFont(self.temp_font)
+        painter.drawText(QRect(rect.left() + 3 * col, rect.top(), inner.right() - rect.left() - 3 * col, rect.height()),
+                         Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, temp_text)
+        painter.restore()
+
+# -------------------------------------------------------------
+# WEEKLY DELEGATE
+# -------------------------------------------------------------
+# Paints (day, icon path, min/max text, date_key) tiles side by side.
+class WeeklyDelegate(QStyledItemDelegate):
+    TILE_HEIGHT = 100
+    ICON = QSize(48, 48)
+
+    def __init__(self, icon_pool, view, parent=None):
+        super().__init__(parent)
+        self.icon_pool = icon_pool
+        self.view = view
+        self.day_font = make_font(12, bold=True)
+        self.temp_font = make_font(12)
+
+    def sizeHint(self, option, index):
+        return QSize(self.view.tile_width(), self.TILE_HEIGHT)
+
+    def paint(self, painter, option, index):
+        day_text, gif_path, temp_text, _ = index.data(RowRole)
+        rect = option.rect
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        paint_tile(painter, rect)
+        painter.setPen(TEXT)
+
+        painter.setFont(self.day_font)
+        painter.drawText(QRect(rect.left(), rect.top() + 6, rect.width(), 18),
+                         Qt.AlignmentFlag.AlignCenter, day_text)
+
+        frame = self.icon_pool.frame(gif_path, self.ICON)
+        if frame is not None:
+            painter.drawImage(rect.left() + (rect.width() - self.ICON.width()) // 2, rect.top() + 26, frame)
+
+        painter.setFont(self.temp_font)
+        painter.drawText(QRect(rect.left(), rect.bottom() - 24, rect.width(), 18),
+                         Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap, temp_text)
+        painter.restore()
+
+# -------------------------------------------------------------
+# VIEWS
+# -------------------------------------------------------------
+def _plain_list_view(view):
+    view.setFrameShape(QFrame.Shape.NoFrame)
+    view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    view.setUniformItemSizes(True)
+    view.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+    view.viewport().setAutoFillBackground(False)
+    view.setStyleSheet("QListView { background: transparent; border: none; }")
+
+class HourlyView(QListView):
+
+    def __init__(self, model, icon_pool, parent=None):
+        super().__init__(parent)
+        _plain_list_view(self)
+        self.setModel(model)
+        self.setItemDelegate(HourlyDelegate(icon_pool, self))
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        icon_pool.attach_view(self)
+
+class WeeklyView(QListView):
+
+    def __init__(self, model, icon_pool, parent=None):
+        super().__init__(parent)
+        _plain_list_view(self)
+        self.setModel(model)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(False)
+        self.setSpacing(0)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setItemDelegate(WeeklyDelegate(icon_pool, self, self))
+        self.setFixedHeight(WeeklyDelegate.TILE_HEIGHT + 4)
+        model.modelReset.connect(self.scheduleDelayedItemsLayout)
+        icon_pool.attach_view(self)
+
+    # Tiles share the width evenly, like the old grid
+    def tile_width(self):
+        return self.viewport().width() // max(self.model().rowCount(), 1)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.scheduleDelayedItemsLayout()
@@ -0,0 +1,157 @@
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, QTimer, QElapsedTimer, QSize, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader
+from metrics import traced
+
+DEFAULT_DELAY_MS = 100
+
+# Every frame of one GIF at one size as QImages, decoded once, or taken
+# ready made from the animation store. Empty until its frames are set.
+class AnimatedIcon:
+
+    def __init__(self, frames=(), delays=()):
+        self.set_frames(frames, delays)
+
+    def set_frames(self, frames, delays):
+        self.frames = list(frames)
+        self.ends = []   # cumulative end time (ms) of each frame in the loop
+        total = 0
+        for delay in delays:
+            total += delay
+            self.ends.append(total)
+        self.duration = total
+
+    # Safe off the GUI thread, QImage and QImageReader are not tied to it
+    @staticmethod
+    @traced("decode.icon")
+    def decode(path, size):
+        reader = QImageReader(path)
+        reader.setScaledSize(size)
+        frames, delays = [], []
+        while reader.canRead():
+            image = reader.read()
+            if image.isNull():
+                break
+            delay = reader.nextImageDelay()
+            frames.append(image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied))
+            delays.append(delay if delay > 0 else DEFAULT_DELAY_MS)
+        return frames, delays
+
+    def frame_at(self, ms):
+        if len(self.frames) < 2:
+            return 0
+        return min(bisect_right(self.ends, ms % self.duration), len(self.frames) - 1)
+
+# -------------------------------------------------------------
+# SHARED ANIMATED ICON POOL
+# -------------------------------------------------------------
+# Replaces one QMovie per tile/row. Each GIF is decoded once per target size
+# (or mapped from the animation store) and its frames are shared by every
+# delegate painting it. One timer on a shared clock repaints the attached
+# views when an icon they show moves on a frame, so refreshing or clicking
+# through days never adds decoders or frames.
+# Without the store a GIF takes a few hundred ms to decode, so that happens
+# on worker threads: the icon paints nothing until its frames arrive, then
+# the views repaint.
+class IconPool(QObject):
+    _decoded = pyqtSignal(object, object)
+
+    def __init__(self, interval_ms=40, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="icons")
+        self._decoded.connect(self._store)
+        self._icons = {}      # (path, w, h) -> AnimatedIcon
+        self._views = []      # item views whose delegates paint pooled icons
+        self._painted = {}    # AnimatedIcon -> frame index last handed to a delegate
+        self.paused = False
+        self._clock = QElapsedTimer()
+        self._clock.start()
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+
+    def icon(self, path, size):
+        key = (path, size.width(), size.height())
+        icon = self._icons.get(key)
+        if icon is None:
+            icon = AnimatedIcon()
+            self._icons[key] = icon
+            stored = self.store.frames(path, size) if self.store is not None else None
+            if stored:
+                icon.set_frames(*stored)
+            else:
+                self._pool.submit(self._decode, key, QSize(size))
+        return icon
+
+    # Worker thread
+    def _decode(self, key, size):
+        self._decoded.emit(key, AnimatedIcon.decode(key[0], size))
+
+    def _store(self, key, decoded):
+        icon = self._icons.get(key)
+        if icon is not None:
+            icon.set_frames(*decoded)
+            self._update_views()
+
+    # Current frame on the shared clock, for delegates that paint icons themselves
+    def frame(self, path, size):
+        icon = self.icon(path, size)
+        if not icon.frames:
+            return None
+        index = icon.frame_at(self._clock.elapsed())
+        self._painted[icon] = index
+        return icon.frames[index]
+
+    # Views are repainted whenever an icon they painted moves to a new frame.
+    # Icons painted for rows since replaced must not keep triggering repaints,
+    # so what was painted is forgotten whenever a view's rows change.
+    def attach_view(self, view):
+        self._views.append(view)
+        model = view.model()
+        model.modelReset.connect(self._forget_painted)
+        model.dataChanged.connect(self._forget_painted)
+        if not self.paused and not self._timer.isActive():
+            self._timer.start()
+
+    # Every view repaints, which records the icons still on screen
+    def _forget_painted(self, *_):
+        self._painted.clear()
+        self._update_views()
+
+    # Icons hold their current frame until resume(), attaching does not restart them
+    def pause(self):
+        self.paused = True
+        self._timer.stop()
+
+    def resume(self):
+        self.paused = False
+        if self._views:
+            self._timer.start()
+
+    def set_interval(self, interval_ms):
+        self._timer.setInterval(interval_ms)
+
+    def _tick(self):
+        now = self._clock.elapsed()
+        if any(icon.frame_at(now) != index for icon, index in self._painted.items()):
+            self._update_views()
+
+    def _update_views(self):
+        for view in self._views:
+            if view.isVisible():
+                view.viewport().update()
+
+    # Queued decodes are dropped, running ones are waited for so no worker
+    # emits into a pool Qt has already deleted
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    # Decoded icons / frames / attached views, stays flat across refreshes
+    def stats(self):
+        return {
+            "decoded": len(self._icons),
+            "frames": sum(len(i.frames) for i in self._icons.values()),
+            "views": len(self._views),
+        }
@@ -0,0 +1,235 @@
+import re
+import json
+import time
+import logging
+import functools
+import threading
+from bisect import bisect_left
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+log = logging.getLogger(__name__)
+
+# Upper bounds in ms, 16/33 are one frame at 60/30 fps
+BUCKETS_MS = (1, 2, 4, 8, 16, 33, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+DEFAULT_PORT = 9464
+
+# -------------------------------------------------------------
+# HISTOGRAM
+# -------------------------------------------------------------
+# Fixed bucket counts plus sum/max, cheap enough to observe every frame.
+# Percentiles are read off the buckets, so they are upper bounds.
+class Histogram:
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.sum += ms
+        self.last = ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return float(bound)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum_ms": self.sum,
+            "avg_ms": self.sum / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": self.max,
+            "last_ms": self.last,
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts)),
+        }
+
+# Shared stand-in returned by span() while disabled
+class _NullSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+# -------------------------------------------------------------
+# METRICS REGISTRY
+# -------------------------------------------------------------
+# Named timing histograms ("span.name" -> Histogram), counters and gauges
+# (last value wins, for things like memory use). Modules
+# time their hot paths with `with metrics.span("fetch.weather"):`; while
+# disabled that is one attribute check and a shared no-op object, nothing is
+# stored. Safe to use from any thread.
+class Metrics:
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name, ms):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(ms)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.gauges[name] = value
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "spans": {name: h.snapshot() for name, h in sorted(self.histograms.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "gauges": dict(sorted(self.gauges.items())),
+            }
+
+    # Prometheus text exposition format
+    def prometheus(self, prefix="weather_lounge"):
+        lines = [
+            f"# HELP {prefix}_span_ms Time spent in instrumented spans (milliseconds)",
+            f"# TYPE {prefix}_span_ms histogram",
+        ]
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                label = f'span="{name}"'
+                cumulative = 0
+                for bound, n in zip([*map(str, h.buckets), "+Inf"], h.counts):
+                    cumulative += n
+                    lines.append(f'{prefix}_span_ms_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f"{prefix}_span_ms_sum{{{label}}} {h.sum}")
+                lines.append(f"{prefix}_span_ms_count{{{label}}} {h.count}")
+            for name, value in sorted(self.counters.items()):
+                metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+            for name, value in sorted(self.gauges.items()):
+                metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+# Process wide registry, off until the app, daemon or overlay turns it on
+metrics = Metrics()
+
+# Decorator form of metrics.span for whole methods
+def traced(name, registry=metrics):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return fn(*args, **kwargs)
+            with _Span(registry, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# -------------------------------------------------------------
+# METRICS ENDPOINT
+# -------------------------------------------------------------
+# /metrics (Prometheus text) and /metrics.json on localhost only.
+class MetricsServer:
+
+    def __init__(self, registry=metrics, host="127.0.0.1", port=DEFAULT_PORT):
+        self.registry = registry
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/metrics":
+                    body, kind = registry.prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+                elif path == "/metrics.json":
+                    body, kind = json.dumps(registry.snapshot()).encode("utf-8"), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                log.debug("%s - %s", self.address_string(), fmt % args)
+
+        return Handler
+
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        thread.start()
+        log.info("Metrics on %s/metrics", self.url)
+        return thread
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,114 +1,218 @@
+import logging
+import threading
 import requests
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from weatherCache import CURRENT_TTL, FORECAST_TTL
+from weatherBundle import WeatherBundle
+from weatherTransport import Transport, SingleFlight
+from weatherProviders import make_provider
+from metrics import traced
+
+log = logging.getLogger(__name__)
+
+OPENWEATHER_URL = "https://api.openweathermap.org"
+
+# (endpoint, place) payloads kept in memory for outages
+LAST_GOOD_MAX = 64
+
+# Immutable handle for a place, safe to pass between threads
+Location = namedtuple("Location", ["name", "lat", "lon"])
 
 class OpenWeatherClient:
 
-    def __init__(self, api_key, city):
+    def __init__(self, api_key, city, cache=None, units="metric", geo_cache=None, lat=None, lon=None, transport=None,
+                 base_url=OPENWEATHER_URL, provider="2.5"):
         self.api_key = api_key
-        self.geo_url = "http://api.openweathermap.org/geo/1.0/direct"
+        # base_url can point at a local weatherDaemon instead of the public API
+        self.base_url = base_url.rstrip("/")
+        self.geo_url = f"{self.base_url}/geo/1.0/direct"
         # 2.5 Endpoint urls
-        self.current_url = "https://api.openweathermap.org/data/2.5/weather"
-        self.forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
-        # 3.0 Endpoint url
-        # self.onecall_url = "https://api.openweathermap.org/data/3.0/onecall"
-        self.session = requests.Session()
-        self.city = city
-        self.set_location(city)
+        self.current_url = f"{self.base_url}/data/2.5/weather"
+        self.forecast_url = f"{self.base_url}/data/2.5/forecast"
+        # 3.0 Endpoint url (needs a One Call subscription)
+        self.onecall_url = f"{self.base_url}/data/3.0/onecall"
+        # Which API a refresh uses, "2.5" (two requests) or "onecall3" (one)
+        self.provider = make_provider(provider, self)
+        # Timeouts, retries, rate limiting and circuit breaker live in the transport
+        self.transport = transport or Transport()
+        self.session = self.transport.session
+        # Concurrent requests for the same endpoint and place share one call
+        self.flights = SingleFlight()
+        # Optional ResponseCache, stale entries are served when the network fails
+        self.cache = cache
+        # Optional GeocodeCache, repeated searches never hit /geo again
+        self.geo_cache = geo_cache
+        self.units = units
+        # Network requests sent per endpoint, lets us check a refresh costs one call each
+        self.request_counts = Counter()
+        self._count_lock = threading.Lock()
+        # Last good payload per (endpoint, lat, lon), served while the API is down
+        # when there is no cache entry. Least recently used first, bounded so a
+        # long running daemon asked for many places does not keep them all.
+        self.last_good = OrderedDict()
+        self._last_good_lock = threading.Lock()
+        # The selected place, always replaced as a whole so a worker reading it
+        # can never see the new latitude with the old longitude.
+        # Known coordinates skip the geocoding round-trip
+        if lat is not None and lon is not None:
+            self.location = Location(city, lat, lon)
+        else:
+            self.set_location(city)
+
+    @property
+    def city(self):
+        return self.location.name
+
+    @property
+    def lat(self):
+        return self.location.lat
+
+    @property
+    def lon(self):
+        return self.location.lon
+
+    def count_request(self, name):
+        with self._count_lock:
+            self.request_counts[name] += 1
 
     def set_location(self, city):
-        params = {
-            "q": city,
-            "limit": 1,
-            "appid": self.api_key
-        }
-        responce = self.session.get(self.geo_url, params=params)
-        responce.raise_for_status()
-        data = responce.json()
+        data = self.geocode(city)
         if not data:
             raise ValueError(f"City '{city}' not found.")
-        self.lat, self.lon = data[0]["lat"], data[0]["lon"]
-        self.city = city
+        self.location = Location(city, data[0]["lat"], data[0]["lon"])
+
+    # Look up matching places for a search string, cached by query
+    def geocode(self, query, limit=10):
+        if self.geo_cache is not None:
+            cached = self.geo_cache.get(query)
+            if cached is not None:
+                return cached
 
-    # Get current weather at a preset location
-    def get_current_weather(self):
         params = {
-            "lat": self.lat,
-            "lon": self.lon,
-            "appid": self.api_key,
-            "units": "metric"
+            "q": query,
+            "limit": limit,
+            "appid": self.api_key
         }
-        res = self.session.get(self.current_url, params=params)
-        res.raise_for_status()
-        return res.json()
-    
-    # Get 3-hourly forecast
-    def get_hourly_forecast(self):
+        return self.flights.do(("geo", query.casefold(), limit), lambda: self._geocode_network(query, params))
+
+    def _geocode_network(self, query, params):
+        self.count_request("geo")
+        data = self.transport.get_json("geo", self.geo_url, params)
+
+        if self.geo_cache is not None and data:
+            self.geo_cache.put(query, data)
+        return data
+
+    # Snapshot of the selected location
+    def current_location(self):
+        return self.location
+
+    # GET an endpoint through the response cache (stale-while-revalidate).
+    # Uses the given Location, or the selected one when None.
+    @traced("fetch")
+    def fetch_json(self, name, url, ttl, location=None, extra=None):
+        location = location or self.location
+        lat, lon = location.lat, location.lon
         params = {
-            "lat": self.lat,
-            "lon": self.lon,
+            "lat": lat,
+            "lon": lon,
             "appid": self.api_key,
-            "units": "metric"
+            "units": self.units,
+            **(extra or {}),
         }
-        r = self.session.get(self.forecast_url, params=params)
-        r.raise_for_status()
-        return r.json()["list"]   # 3-hour steps
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(name, lat, lon, self.units)
+            fresh = self.cache.get_fresh(key, ttl)
+            if fresh is not None:
+                return fresh
+
+        flight = (name, round(lat, 4), round(lon, 4), self.units)
+        return self.flights.do(flight, lambda: self._fetch_network(name, url, params, key, lat, lon))
+
+    def _fetch_network(self, name, url, params, key, lat, lon):
+        last_key = (name, round(lat, 4), round(lon, 4))
+        try:
+            self.count_request(name)
+            data = self.transport.get_json(name, url, params)
+        except requests.RequestException as e:
+            stale = self.cache.get(key) if key else None
+            if stale is not None:
+                log.warning("Serving %s from cache (%.0fs old): %s", name, stale[1], e)
+                return stale[0]
+            with self._last_good_lock:
+                last = self.last_good.get(last_key)
+            if last is None:
+                raise
+            log.warning("Serving last good %s: %s", name, e)
+            return last
+
+        with self._last_good_lock:
+            self.last_good[last_key] = data
+            self.last_good.move_to_end(last_key)
+            while len(self.last_good) > LAST_GOOD_MAX:
+                self.last_good.popitem(last=False)
+        if key:
+            self.cache.put(key, data)
+        return data
+
+    # Per endpoint latency/error counters and circuit breaker state
+    def transport_stats(self):
+        return self.transport.stats()
+
+    # Cached payload for one endpoint, however old, or None
+    def cached_payload(self, name, location=None):
+        if self.cache is None:
+            return None
+        location = location or self.current_location()
+        hit = self.cache.get(self.cache.make_key(name, location.lat, location.lon, self.units))
+        return hit[0] if hit else None
+
+    # Last known bundle for the current location, however old, or None.
+    # Lets the UI paint immediately on start up while a refresh runs.
+    def get_cached_weather(self):
+        return self.provider.cached(self.current_location())
+
+    # Get current weather at a preset location
+    def get_current_weather(self, location=None):
+        return self.fetch_json("weather", self.current_url, CURRENT_TTL, location)
+
+    # Full 5 day / 3 hour forecast response (list + city info)
+    def get_forecast(self, location=None):
+        return self.fetch_json("forecast", self.forecast_url, FORECAST_TTL, location)
+
+    # Get 3-hourly forecast
+    def get_hourly_forecast(self, location=None):
+        return self.get_forecast(location)["list"]   # 3-hour steps
 
     # Daily forcast not available, derive it from 3-hour forcast
-    def get_daily_forecast(self):
-        hourly = self.get_hourly_forecast()
-        daily = {}
-        for entry in hourly:
-            date = entry["dt_txt"].split(" ")[0]
-            daily.setdefault(date, []).append(entry)
-        
-        return daily
-
-    # Bundle everything in one go
-    def get_all_weather(self):
-        return {
-            "current": self.get_current_weather(),
-            "hourly": self.get_hourly_forecast(),
-            "daily": self.get_daily_forecast()
-        }
+    def get_daily_forecast(self, location=None):
+        return WeatherBundle({}, self.get_forecast(location)).daily
+
+    # Current, hourly and daily data from the onecall endpoint in one request
+    def get_onecall(self, location=None):
+        return self.fetch_json("onecall", self.onecall_url, CURRENT_TTL, location, {"exclude": "minutely,alerts"})
+
+    # Bundle everything in one go through the configured provider
+    def get_all_weather(self, location=None):
+        location = location or self.current_location()
+        return self.provider.fetch(location)
 
-# -------------------------------------------------------------
-# Methods for open weather map api with access to 3.0 
-# -------------------------------------------------------------
-    # # Helper function make a request to openweathermap API.
-    # def request(self, exclude=None):
-    #     params = {
-    #         "lat": self.lat,
-    #         "lon": self.lon,
-    #         "appid": self.api_key,
-    #         "units": "metric"
-    #     }
-    #     if exclude:
-    #         params["exclude"] = exclude
-
-    #     r = self.session.get(self.onecall_url, params=params)
-    #     r.raise_for_status()
-    #     return r.json()
-    
-    # # Get current weather at a preset location
-    # def get_current_weather(self):
-    #     data = self.request(exclude="minutely,current,daily,alerts")
-    #     return data["current"]
-
-    # # Get the next 48h weather forcast at a preset location
-    # def get_hourly_forecast(self):
-    #     data = self.request(exclude="minutely,current,daily,alerts")
-    #     return data["hourly"]
-    
-    # # Get the weekly forcast at a preset location
-    # def get_weekly_forecast(self):
-    #     data = self.request(exclude="minutely,current,hourly,alerts")
-    #     return data["daily"]
-    
-    # # Return current, hourly, and daily weather in one call
-    # def get_all_weather(self):
-    #     data = self.request()  # no exclusions → full dataset
-
-    #     return {
-    #         "current": data.get("current"),
-    #         "hourly": data.get("hourly"),
-    #         "daily": data.get("daily")
-    #     }
\ No newline at end of file
+    # Fetch several locations at once with at most max_concurrency requests in
+    # flight. Shares this client's cache and connection pool.
+    # Returns {location: WeatherBundle or the exception that stopped it}.
+    def fetch_many(self, locations, max_concurrency=8):
+        provider = self.provider
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="weather-many") as pool:
+            futures = {
+                loc: [pool.submit(request) for request in provider.requests(loc)]
+                for loc in locations
+            }
+            for loc, parts in futures.items():
+                try:
+                    results[loc] = provider.assemble([f.result() for f in parts], loc)
+                except Exception as e:
+                    results[loc] = e
+        return results
@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+
+GEOCODE_TTL = 30 * 24 * 60 * 60
+
+# "Paris, Île-de-France, FR" style label used in the dropdown
+def format_place(g):
+    name = g.get("name", "")
+    country = g.get("country", "")
+    state = g.get("state", "")
+    if state:
+        return f"{name}, {state}, {country}"
+    return f"{name}, {country}"
+
+# Case and accent insensitive form used for keys and prefixes
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text.strip().casefold())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+# -------------------------------------------------------------
+# GEOCODE CACHE (LRU + DISK)
+# -------------------------------------------------------------
+# Query -> list of geo results. Hot queries live in an in-memory LRU, every
+# answer is also written to a small JSON file so searches survive restarts.
+class GeocodeCache:
+
+    def __init__(self, path=None, max_memory=256, max_disk=2000, ttl=GEOCODE_TTL):
+        self.path = path
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._disk = self._load()
+
+    def _load(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {q: e for q, e in entries.items() if now - e["stored"] <= self.ttl}
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._disk, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def get(self, query):
+        key = normalize(query)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            entry = self._disk.get(key)
+            if entry is None or time.time() - entry["stored"] > self.ttl:
+                return None
+            self._remember(key, entry["results"])
+            return entry["results"]
+
+    def put(self, query, results):
+        key = normalize(query)
+        with self._lock:
+            self._remember(key, results)
+            self._disk[key] = {"stored": time.time(), "results": results}
+            if len(self._disk) > self.max_disk:
+                oldest = sorted(self._disk, key=lambda q: self._disk[q]["stored"])
+                for q in oldest[:len(self._disk) - self.max_disk]:
+                    del self._disk[q]
+            self._save()
+
+    # Every place we have ever resolved, used to seed the prefix index
+    def known_places(self):
+        with self._lock:
+            return [g for e in self._disk.values() for g in e["results"]]
+
+    def _remember(self, key, results):
+        self._memory[key] = results
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+
+# -------------------------------------------------------------
+# PLACE PREFIX INDEX
+# -------------------------------------------------------------
+# Trie over place names so the dropdown can suggest matches on every key
+# press without touching the network.
+class PlaceTrie:
+
+    def __init__(self, places=()):
+        self.root = {}
+        self._seen = set()
+        self.add_many(places)
+
+    @staticmethod
+    def place_id(g):
+        return (g.get("name"), g.get("state"), g.get("country"),
+                round(g["lat"], 2), round(g["lon"], 2))
+
+    def add(self, g):
+        pid = self.place_id(g)
+        if pid in self._seen:
+            return
+        self._seen.add(pid)
+
+        node = self.root
+        for ch in normalize(g.get("name", "")):
+            node = node.setdefault(ch, {})
+        node.setdefault(None, []).append(g)
+
+    def add_many(self, places):
+        for g in places:
+            self.add(g)
+
+    # Places whose name starts with prefix, shortest names first
+    def search(self, prefix, limit=10):
+        node = self.root
+        for ch in normalize(prefix.split(",")[0]):
+            node = node.get(ch)
+            if node is None:
+                return []
+
+        results = []
+        level = [node]
+        while level and len(results) < limit:
+            next_level = []
+            for n in level:
+                for key, child in n.items():
+                    if key is None:
+                        results.extend(child)
+                    else:
+                        next_level.append(child)
+            level = next_level
+        return results[:limit]
+
+# Last location shown, so start up can skip the IP lookup and geocoding.
+# source is "ip" when it came from the IP lookup, "user" when picked by hand.
+def load_last_location(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            last = json.load(f)
+        return last if {"city", "lat", "lon"} <= last.keys() else None
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def save_last_location(path, city, lat, lon, source):
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"city": city, "lat": lat, "lon": lon, "source": source}, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+# Watched cities for the multi-city strip, [{"name", "lat", "lon"}, ...]
+def load_watch_list(path, default=()):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return list(default)
+
+def save_watch_list(path, places):
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(places, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+# Bundled list of major cities shipped in assets/places.json
+def load_bundled_places(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
@@ -0,0 +1,107 @@
+import math
+import time
+import random
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+FORECAST_SLOT = 3 * 60 * 60
+
+# -------------------------------------------------------------
+# REFRESH PLAN
+# -------------------------------------------------------------
+# Works out when the next fetch is worth doing. OpenWeather publishes a new
+# current observation every ~10 minutes (the payload's dt) and the forecast
+# moves on at every 3 hour UTC slot boundary, so we fetch just after whichever
+# of those comes first instead of on a fixed clock. Failures back off
+# exponentially. Everything is in seconds and wall clock time.
+class RefreshPlan:
+
+    def __init__(self, current_interval=30 * 60, min_interval=10 * 60, max_interval=60 * 60,
+                 margin=90, jitter=60, backoff=60, max_backoff=30 * 60):
+        self.current_interval = current_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.margin = margin
+        self.jitter = jitter
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failures = 0
+
+    # First slot boundary after now
+    @staticmethod
+    def next_slot(now):
+        return (math.floor(now / FORECAST_SLOT) + 1) * FORECAST_SLOT
+
+    # Delay until the next fetch after a successful one whose observation time was dt
+    def after_success(self, dt, now=None):
+        now = time.time() if now is None else now
+        self.failures = 0
+
+        next_current = dt + self.current_interval
+        next_forecast = self.next_slot(now)
+        due = min(next_current, next_forecast) + self.margin
+
+        delay = min(max(due - now, self.min_interval), self.max_interval)
+        return delay + random.uniform(0, self.jitter)
+
+    def after_failure(self):
+        self.failures += 1
+        delay = min(self.max_backoff, self.backoff * (2 ** (self.failures - 1)))
+        # Full jitter on top of half the delay so retries never bunch up
+        return delay / 2 + random.uniform(0, delay / 2)
+
+
+# -------------------------------------------------------------
+# REFRESH SCHEDULER
+# -------------------------------------------------------------
+# Single-shot timer driven by RefreshPlan. While paused (window hidden or
+# minimized) nothing fires, and on resume a refresh that fell due during the
+# pause runs once straight away rather than once per missed interval.
+class RefreshScheduler(QObject):
+    due = pyqtSignal()
+
+    def __init__(self, plan=None, parent=None):
+        super().__init__(parent)
+        self.plan = plan or RefreshPlan()
+        self.due_at = None
+        self.paused = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._fire)
+
+    def schedule_in(self, seconds):
+        self.due_at = time.time() + seconds
+        if not self.paused:
+            self._timer.start(int(seconds * 1000))
+
+    # Call with the observation time (dt) of the payload just shown
+    def success(self, dt):
+        self.schedule_in(self.plan.after_success(dt))
+
+    def failure(self):
+        self.schedule_in(self.plan.after_failure())
+
+    def pause(self):
+        if self.paused:
+            return
+        self.paused = True
+        self._timer.stop()
+
+    def resume(self):
+        if not self.paused:
+            return
+        self.paused = False
+        if self.due_at is None:
+            return
+        remaining = self.due_at - time.time()
+        if remaining <= 0:
+            # Catch up once, the next schedule comes from the result
+            self._fire()
+        else:
+            self._timer.start(int(remaining * 1000))
+
+    def seconds_until_due(self):
+        return None if self.due_at is None else max(0.0, self.due_at - time.time())
+
+    def _fire(self):
+        self.due_at = None
+        self.due.emit()
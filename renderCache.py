@@ -0,0 +1,201 @@
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import Qt, QSize, QRect, QObject, pyqtSignal
+from PyQt6.QtGui import QPixmap, QPainter, QImageReader
+from metrics import metrics, traced
+
+# -------------------------------------------------------------
+# RENDER CACHE
+# -------------------------------------------------------------
+# Window sized, ready-to-blit pixmaps. Backgrounds are scaled once per window
+# size, and when a whole foreground (GIF) animation fits in the budget each
+# frame is composited over the background once, so paintEvent is a single
+# unscaled drawPixmap. Keys carry the window size and device pixel ratio,
+# entries are evicted LRU past max_bytes.
+class RenderCache:
+
+    def __init__(self, max_bytes=96 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def pixel_size(size, dpr):
+        return QSize(round(size.width() * dpr), round(size.height() * dpr))
+
+    def _get(self, key):
+        pix = self._entries.get(key)
+        if pix is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return pix
+
+    def _put(self, key, pix):
+        self._entries[key] = pix
+        self.bytes += pix.width() * pix.height() * 4
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self.bytes -= old.width() * old.height() * 4
+
+    # Source pixmap stretched to the window, same look as drawPixmap(rect, pix)
+    def _scale(self, source, size, dpr):
+        target = self.pixel_size(size, dpr)
+        pix = source.scaled(target, Qt.AspectRatioMode.IgnoreAspectRatio,
+                            Qt.TransformationMode.SmoothTransformation)
+        pix.setDevicePixelRatio(dpr)
+        return pix
+
+    def background(self, asset, source, size, dpr):
+        key = ("bg", asset, size.width(), size.height(), dpr)
+        pix = self._get(key)
+        if pix is None:
+            pix = self._scale(source, size, dpr)
+            self._put(key, pix)
+        return pix
+
+    # Background with one foreground frame (QImage) drawn over it
+    def composite(self, bg_asset, bg_source, fg_asset, frame_no, frame, size, dpr):
+        key = ("frame", bg_asset, fg_asset, frame_no, size.width(), size.height(), dpr)
+        pix = self._get(key)
+        if pix is not None:
+            return pix
+
+        pix = QPixmap(self.pixel_size(size, dpr))
+        pix.setDevicePixelRatio(dpr)
+        pix.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pix)
+        if bg_source is not None and not bg_source.isNull():
+            painter.drawPixmap(0, 0, self.background(bg_asset, bg_source, size, dpr))
+        painter.drawImage(0, 0, self._scale(frame, size, dpr))
+        painter.end()
+
+        self._put(key, pix)
+        return pix
+
+    # True when every composited frame plus the background fits in max_bytes.
+    # Frames are drawn in a cycle, so a cache holding only some of them evicts
+    # each one just before it is needed again and never hits.
+    def fits(self, frame_count, size, dpr):
+        target = self.pixel_size(size, dpr)
+        return 0 < frame_count and (frame_count + 1) * target.width() * target.height() * 4 <= self.max_bytes
+
+    # Background with the current foreground frame, from composites when the
+    # animation fits, otherwise the cached background with the frame scaled over it
+    def draw_frame(self, painter, bg_asset, bg_source, fg_asset, frame_no, frame_count, frame, size, dpr):
+        if self.fits(frame_count, size, dpr):
+            painter.drawPixmap(0, 0, self.composite(bg_asset, bg_source, fg_asset, frame_no, frame, size, dpr))
+            return
+        if bg_source is not None and not bg_source.isNull():
+            painter.drawPixmap(0, 0, self.background(bg_asset, bg_source, size, dpr))
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawImage(QRect(0, 0, size.width(), size.height()), frame)
+
+    # Called on resize/scene change, old sizes are never drawn again
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+
+# -------------------------------------------------------------
+# BACKGROUND LOADER
+# -------------------------------------------------------------
+# Decodes background JPEGs on a worker thread straight at the window's pixel
+# size (QImageReader scaled decoding never allocates the full image) and keeps
+# the last few in an LRU. Scene switches that hit the LRU are instant.
+class BackgroundLoader(QObject):
+    # (path) once a requested image is available through get()
+    ready = pyqtSignal(str)
+    _decoded = pyqtSignal(object, object)
+
+    def __init__(self, max_images=6, parent=None):
+        super().__init__(parent)
+        self.max_images = max_images
+        self._images = OrderedDict()   # (path, w, h) -> QPixmap
+        self._pending = set()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="backgrounds")
+        self._decoded.connect(self._store)
+
+    @staticmethod
+    def _key(path, pixel_size):
+        return (path, pixel_size.width(), pixel_size.height())
+
+    def get(self, path, pixel_size):
+        key = self._key(path, pixel_size)
+        pix = self._images.get(key)
+        if pix is not None:
+            self._images.move_to_end(key)
+        return pix
+
+    # Decode in the background unless cached or already on its way
+    def request(self, path, pixel_size):
+        key = self._key(path, pixel_size)
+        if key in self._images or key in self._pending:
+            return
+        self._pending.add(key)
+        self._pool.submit(self._decode, key, QSize(pixel_size))
+
+    def preload(self, paths, pixel_size):
+        for path in paths:
+            self.request(path, pixel_size)
+
+    # Worker thread: QImage is safe off the GUI thread, QPixmap is not
+    @traced("decode.background")
+    def _decode(self, key, pixel_size):
+        reader = QImageReader(key[0])
+        reader.setScaledSize(pixel_size)
+        self._decoded.emit(key, reader.read())
+
+    def _store(self, key, image):
+        self._pending.discard(key)
+        if image.isNull():
+            return
+        self._images[key] = QPixmap.fromImage(image)
+        while len(self._images) > self.max_images:
+            self._images.popitem(last=False)
+        self.ready.emit(key[0])
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# -------------------------------------------------------------
+# FRAME TIMER
+# -------------------------------------------------------------
+# Wall and CPU time spent inside paintEvent, so the cost per frame can be
+# compared before and after rendering changes.
+class FrameTimer:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.total_ms = 0.0
+        self.total_cpu_ms = 0.0
+        self.max_ms = 0.0
+
+    def start(self):
+        return time.perf_counter(), time.thread_time()
+
+    def stop(self, started):
+        wall = (time.perf_counter() - started[0]) * 1000
+        cpu = (time.thread_time() - started[1]) * 1000
+        metrics.observe("paint.frame", wall)
+        self.frames += 1
+        self.total_ms += wall
+        self.total_cpu_ms += cpu
+        self.max_ms = max(self.max_ms, wall)
+
+    def stats(self):
+        n = max(self.frames, 1)
+        return {
+            "frames": self.frames,
+            "avg_ms": self.total_ms / n,
+            "avg_cpu_ms": self.total_cpu_ms / n,
+            "max_ms": self.max_ms,
+        }
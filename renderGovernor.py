@@ -0,0 +1,188 @@
+import os
+import sys
+import glob
+import time
+import logging
+import subprocess
+from PyQt6.QtCore import QObject, QTimer, QEvent, QElapsedTimer, pyqtSignal, Qt
+from PyQt6.QtGui import QGuiApplication
+from metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# Render modes, from most to least work
+FULL = "full"        # animations run, repaints capped at max_fps
+STATIC = "static"    # animations hold their current frame (battery, high load)
+PAUSED = "paused"    # nothing animates or repaints (hidden, occluded, screen locked)
+
+# True on battery, False on mains, None when the platform does not say
+def on_battery():
+    if sys.platform.startswith("linux"):
+        supplies = glob.glob("/sys/class/power_supply/*/online")
+        if not supplies:
+            return None
+        try:
+            online = []
+            for path in supplies:
+                with open(path, "r") as f:
+                    online.append(f.read().strip() == "1")
+        except OSError:
+            return None
+        # Any mains adapter (AC, USB-C) online means we are not on battery
+        return not any(online)
+    if sys.platform == "win32":
+        import ctypes
+
+        class SYSTEM_POWER_STATUS(ctypes.Structure):
+            _fields_ = [("ACLineStatus", ctypes.c_ubyte), ("BatteryFlag", ctypes.c_ubyte),
+                        ("BatteryLifePercent", ctypes.c_ubyte), ("SystemStatusFlag", ctypes.c_ubyte),
+                        ("BatteryLifeTime", ctypes.c_ulong), ("BatteryFullLifeTime", ctypes.c_ulong)]
+        status = SYSTEM_POWER_STATUS()
+        if not ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+            return None
+        return {0: True, 1: False}.get(status.ACLineStatus)
+    if sys.platform == "darwin":
+        try:
+            out = subprocess.run(["pmset", "-g", "batt"], capture_output=True, text=True, timeout=2).stdout
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return "Battery Power" in out
+    return None
+
+# 1 minute load average per core, None where there is no load average
+def system_load():
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (OSError, AttributeError):
+        return None
+
+# -------------------------------------------------------------
+# RENDER GOVERNOR
+# -------------------------------------------------------------
+# Decides how much animation the window can afford and tells it through
+# modeChanged. The window reports when it is shown or hidden, the governor
+# also watches expose events (covered windows, where the platform reports
+# them) and the application state (locked screen / suspended), and checks
+# power and load every check_interval seconds.
+# While animating, frame_ready() coalesces frame changes into at most
+# max_fps repaints of the target.
+class RenderGovernor(QObject):
+    modeChanged = pyqtSignal(str)
+
+    def __init__(self, target, max_fps=30, static_on_battery=True, max_load=0.9, check_interval=30, parent=None):
+        super().__init__(parent)
+        self.target = target
+        self.max_fps = max_fps
+        self.static_on_battery = static_on_battery
+        self.max_load = max_load
+        self.visible = False
+        self.exposed = True
+        self.suspended = False
+        self.battery = None
+        self.load = None
+        self.forced = None
+        self.mode = PAUSED
+        self._window = None
+        self._since_paint = QElapsedTimer()
+        self._since_paint.start()
+        self._paint_timer = QTimer(self)
+        self._paint_timer.setSingleShot(True)
+        self._paint_timer.timeout.connect(self._paint)
+        self._cpu = (time.monotonic(), time.process_time())
+        self.cpu_percent = 0.0
+        self._check_timer = QTimer(self)
+        self._check_timer.setInterval(int(check_interval * 1000))
+        self._check_timer.timeout.connect(self.check)
+        QGuiApplication.instance().applicationStateChanged.connect(self._state_changed)
+
+    @classmethod
+    def from_config(cls, target, options, parent=None):
+        return cls(target, parent=parent, **(options or {}))
+
+    @property
+    def frame_interval_ms(self):
+        return int(1000 / self.max_fps) if self.max_fps else 0
+
+    @property
+    def animating(self):
+        return self.mode == FULL
+
+    def start(self):
+        self.check()
+        self._check_timer.start()
+
+    def stop(self):
+        self._check_timer.stop()
+        self._paint_timer.stop()
+
+    # Called from the window's show/hide/state change handlers
+    def set_visible(self, visible):
+        self.visible = visible
+        if visible and self._window is None and self.target.windowHandle() is not None:
+            self._window = self.target.windowHandle()
+            self._window.installEventFilter(self)
+        self._update()
+
+    # Pin a mode (benchmarks, debugging), None goes back to automatic
+    def force(self, mode):
+        self.forced = mode
+        self._update()
+
+    def eventFilter(self, obj, event):
+        if obj is self._window and event.type() == QEvent.Type.Expose:
+            self.exposed = self._window.isExposed()
+            self._update()
+        return False
+
+    def _state_changed(self, state):
+        self.suspended = state in (Qt.ApplicationState.ApplicationSuspended, Qt.ApplicationState.ApplicationHidden)
+        self._update()
+
+    # Power, load and our own CPU use since the last check
+    def check(self):
+        now, cpu = time.monotonic(), time.process_time()
+        self.cpu_percent = 100 * (cpu - self._cpu[1]) / max(now - self._cpu[0], 1e-6)
+        self._cpu = (now, cpu)
+        metrics.gauge("render.cpu_percent", round(self.cpu_percent, 1))
+
+        self.battery = on_battery() if self.static_on_battery else None
+        self.load = system_load() if self.max_load else None
+        self._update()
+
+    def _wanted(self):
+        if self.forced:
+            return self.forced
+        if not self.visible or not self.exposed or self.suspended:
+            return PAUSED
+        if self.battery or (self.load is not None and self.load > self.max_load):
+            return STATIC
+        return FULL
+
+    def _update(self):
+        mode = self._wanted()
+        if mode == self.mode:
+            return
+        log.info("Render mode %s -> %s (battery=%s, load=%s)", self.mode, mode, self.battery, self.load)
+        self.mode = mode
+        if mode != FULL:
+            self._paint_timer.stop()
+        metrics.count(f"render.mode.{mode}")
+        self.modeChanged.emit(mode)
+
+    # Connected to frameChanged of animations, repaints at most max_fps times a second
+    def frame_ready(self, *_):
+        if self.mode != FULL or self._paint_timer.isActive():
+            return
+        wait = self.frame_interval_ms - self._since_paint.elapsed()
+        if wait > 0:
+            self._paint_timer.start(wait)
+        else:
+            self._paint()
+
+    def _paint(self):
+        self._since_paint.restart()
+        self.target.update()
+
+    def stats(self):
+        return {"mode": self.mode, "max_fps": self.max_fps, "battery": self.battery,
+                "load": self.load, "cpu_percent": round(self.cpu_percent, 1)}
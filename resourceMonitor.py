@@ -0,0 +1,80 @@
+import os
+import gc
+import sys
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from PyQt6.QtCore import QObject, QTimer
+from metrics import metrics
+
+log = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_S = 30
+
+# Resident set size in bytes. Current value from /proc on Linux, elsewhere the
+# peak from getrusage (still fine for spotting growth), None if neither works.
+def rss_bytes():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+# Live QObjects that Python holds a wrapper for, by class name. Parented
+# objects created in C++ are only seen through root.findChildren().
+def qobject_types():
+    return Counter(type(obj).__name__ for obj in gc.get_objects() if isinstance(obj, QObject))
+
+# One reading of everything the soak test budgets and the runtime gauges show
+def sample_resources(root=None):
+    types = qobject_types()
+    sample = {
+        "rss_mb": (rss_bytes() or 0) / 1e6,
+        "qobjects": sum(types.values()),
+        "qt_children": len(root.findChildren(QObject)) if root is not None else 0,
+        "gc_objects": len(gc.get_objects()),
+        "threads": threading.active_count(),
+    }
+    if tracemalloc.is_tracing():
+        sample["py_heap_mb"] = tracemalloc.get_traced_memory()[0] / 1e6
+    return sample, types
+
+# -------------------------------------------------------------
+# RUNTIME RESOURCE GAUGES
+# -------------------------------------------------------------
+# Samples memory and object counts every interval seconds into the metrics
+# registry (resources.rss_mb, resources.qobjects, ...) so a deployed widget
+# can be watched through the overlay or /metrics. Walking the heap takes a
+# few ms, so nothing is sampled while the registry is disabled.
+class ResourceMonitor(QObject):
+
+    def __init__(self, root, interval_s=DEFAULT_INTERVAL_S, trace=False, registry=metrics, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.registry = registry
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(interval_s * 1000))
+        self.timer.timeout.connect(self.sample)
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def sample(self):
+        if not self.registry.enabled:
+            return None
+        sample, _ = sample_resources(self.root)
+        for name, value in sample.items():
+            self.registry.gauge(f"resources.{name}", round(value, 2))
+        return sample
@@ -0,0 +1,154 @@
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import itertools
+import tempfile
+import statistics
+import tracemalloc
+from benchmark import FakeOpenWeather, load_fixtures, configure_app, wait_until, git_commit
+
+# Scene changes the soak cycles through, one per cycle stands in for the
+# hourly condition changes of a long running widget
+SCENES = [("rain", "10d"), ("clear", "01n"), ("snow", "13d"), ("thunderstorm", "11n"), ("clouds", "04d"), ("mist", "50d")]
+
+# -------------------------------------------------------------
+# SOAK RUN
+# -------------------------------------------------------------
+# Drives thousands of refresh / day click / scene change cycles through a
+# real window on the offscreen platform and samples memory and live object
+# counts as it goes. Growth is measured from the end of the warmup (caches
+# full, everything lazily created exists) to the end of the run, after
+# pending deleteLater()s and a full collection.
+def soak(args):
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QEvent, QEventLoop
+    from resourceMonitor import sample_resources
+    import app
+
+    server = FakeOpenWeather(load_fixtures(), latency=args.latency, seed=args.seed)
+    server.start()
+    configure_app(app, server.url, tempfile.mkdtemp(prefix="soak-app-"))
+    qapp = QApplication.instance() or QApplication(sys.argv[:1])
+    window = app.LofiWeatherApp()
+    window.show()
+    wait_until(lambda: hasattr(window, "bundle"))
+    if args.uncached:
+        window.api.cache = None
+
+    def refresh():
+        loop = QEventLoop()
+        window.fetcher.ready.connect(loop.quit)
+        window.fetcher.failed.connect(loop.quit)
+        window.update_weather()
+        loop.exec()
+        window.fetcher.ready.disconnect(loop.quit)
+        window.fetcher.failed.disconnect(loop.quit)
+
+    def settle():
+        QApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+        qapp.processEvents()
+        gc.collect()
+
+    days = itertools.cycle(list(window.daily_data))
+    scenes = itertools.cycle(SCENES)
+    def cycle():
+        # Forget what is on screen so every refresh re-renders like new data would
+        window._last_digest = None
+        refresh()
+        window.update_hourly_panel(next(days))
+        window.hourly_view.viewport().repaint()
+        window.set_scene(*next(scenes))
+        if window.movie:
+            window.movie.jumpToNextFrame()
+        window.repaint()
+
+    started = time.perf_counter()
+    for _ in range(args.warmup):
+        cycle()
+    settle()
+    tracemalloc.start(10)
+    base, base_types = sample_resources(window)
+    base_heap = tracemalloc.take_snapshot()
+
+    samples = [(0, base)]
+    for i in range(1, args.cycles + 1):
+        cycle()
+        if i % args.sample_every == 0 or i == args.cycles:
+            settle()
+            sample, types = sample_resources(window)
+            samples.append((i, sample))
+            print(f"{i:>7} cycles  rss {sample['rss_mb']:7.1f} MB  heap {sample['py_heap_mb']:6.2f} MB  "
+                  f"qobjects {sample['qobjects']:>6}  children {sample['qt_children']:>6}", file=sys.stderr)
+
+    final = samples[-1][1]
+    top_allocations = [str(stat) for stat in tracemalloc.take_snapshot().compare_to(base_heap, "lineno")[:10]]
+    tracemalloc.stop()
+    window.close()
+    settle()
+    server.stop()
+
+    growth = {name: final[name] - base[name] for name in base}
+    per_1k = {}
+    if len(samples) > 2:
+        x = [i for i, _ in samples]
+        for name in base:
+            slope = statistics.linear_regression(x, [s[name] for _, s in samples]).slope
+            per_1k[name] = slope * 1000
+    budgets = {
+        "rss_mb": args.rss_budget_mb,
+        "py_heap_mb": args.heap_budget_mb,
+        "qobjects": args.qobject_budget,
+        "qt_children": args.qobject_budget,
+    }
+    over = {name: growth[name] for name, budget in budgets.items() if growth[name] > budget}
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "cycles": args.cycles,
+            "warmup": args.warmup,
+            "uncached": args.uncached,
+            "took_s": round(time.perf_counter() - started, 1),
+            "server_requests": server.requests,
+        },
+        "baseline": base,
+        "final": final,
+        "growth": growth,
+        "growth_per_1k_cycles": per_1k,
+        "budgets": budgets,
+        "over_budget": over,
+        "qobject_growth": dict((types - base_types).most_common(10)),
+        "top_allocations": top_allocations,
+    }
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    parser = argparse.ArgumentParser(description="Soak the weather lounge and fail on memory or object growth")
+    parser.add_argument("--cycles", type=int, default=2000, help="refresh/day click/scene change cycles")
+    parser.add_argument("--warmup", type=int, default=100, help="cycles run before the baseline is taken")
+    parser.add_argument("--sample-every", type=int, default=100)
+    parser.add_argument("--uncached", action="store_true", help="send every refresh to the fake server")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake server response delay (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rss-budget-mb", type=float, default=25.0)
+    parser.add_argument("--heap-budget-mb", type=float, default=5.0, help="Python heap growth seen by tracemalloc")
+    parser.add_argument("--qobject-budget", type=int, default=25, help="growth in live QObjects")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = soak(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for name, value in report["over_budget"].items():
+        print(f"{name} grew by {value:.2f}, budget {report['budgets'][name]}", file=sys.stderr)
+    sys.exit(1 if report["over_budget"] else 0)
@@ -0,0 +1,67 @@
+import sys
+import time
+import threading
+
+# -------------------------------------------------------------
+# STARTUP PROFILER
+# -------------------------------------------------------------
+# Records how long each start up phase took and when it finished relative
+# to process start. Phases may run on worker threads. When enabled, the
+# report is printed once every expected phase has finished.
+class StartupProfiler:
+
+    def __init__(self, t0=None, enabled=False, stream=None):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.enabled = enabled
+        self.stream = stream or sys.stderr
+        self.phases = []
+        self.expected = set()
+        self._starts = {}
+        self._lock = threading.Lock()
+        self._armed = False
+        self._reported = False
+
+    # Phases that must finish before the report is printed
+    def expect(self, *names):
+        with self._lock:
+            done = {p[0] for p in self.phases}
+            self.expected.update(n for n in names if n not in done)
+            self._armed = True
+
+    # True once every expected phase has finished
+    @property
+    def finished(self):
+        return self._reported
+
+    def begin(self, name):
+        with self._lock:
+            self._starts[name] = time.perf_counter()
+
+    # Phases that were never begun (or already ended) are ignored
+    def end(self, name):
+        now = time.perf_counter()
+        with self._lock:
+            if name not in self._starts:
+                return
+            start = self._starts.pop(name)
+            self.phases.append((name, (now - start) * 1000, (now - self.t0) * 1000))
+            self.expected.discard(name)
+            finished = self._armed and not self.expected and not self._reported
+            if finished:
+                self._reported = True
+        if finished and self.enabled:
+            self.report()
+
+    # Record a phase measured from an earlier timestamp (e.g. module imports)
+    def record(self, name, start):
+        with self._lock:
+            self._starts[name] = start
+        self.end(name)
+
+    def report(self):
+        out = self.stream
+        print("Startup profile (ms)", file=out)
+        print(f"  {'phase':<20}{'took':>10}{'done at':>10}", file=out)
+        for name, took, done_at in self.phases:
+            print(f"  {name:<20}{took:>10.1f}{done_at:>10.1f}", file=out)
+        out.flush()
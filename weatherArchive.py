@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import zlib
+import logging
+import threading
+import requests
+from urllib.parse import urlsplit
+from weatherCache import default_cache_dir
+from weatherTransport import Transport, EndpointStats
+from metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# Query parameters that identify a response, the API key never does
+IGNORED_PARAMS = {"appid"}
+
+def default_archive_dir():
+    return os.path.join(default_cache_dir(), "archive")
+
+# Raised in replay mode for a request that was never recorded. It is a
+# RequestException so the client falls back to its cache exactly as it does
+# when the network is down.
+class ReplayMissError(requests.RequestException):
+    pass
+
+# -------------------------------------------------------------
+# RESPONSE ARCHIVE
+# -------------------------------------------------------------
+# Recorded responses in two files: responses.dat holds zlib compressed JSON
+# bodies back to back, index.json maps each request key to the
+# [offset, length, recorded_at] of its newest body. Appends never rewrite
+# old bodies, compact() drops the ones no longer indexed.
+class WeatherArchive:
+
+    DATA = "responses.dat"
+    INDEX = "index.json"
+
+    def __init__(self, path=None):
+        self.path = path or default_archive_dir()
+        os.makedirs(self.path, exist_ok=True)
+        self.data_file = os.path.join(self.path, self.DATA)
+        self.index_file = os.path.join(self.path, self.INDEX)
+        self._lock = threading.Lock()
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f)["entries"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _save_index(self):
+        tmp = f"{self.index_file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "entries": self.index}, f, separators=(",", ":"))
+        os.replace(tmp, self.index_file)
+
+    # Endpoint path plus the identifying params, coordinates rounded like the cache
+    @staticmethod
+    def make_key(url, params):
+        parts = []
+        for name, value in sorted((params or {}).items()):
+            if name in IGNORED_PARAMS:
+                continue
+            if isinstance(value, float):
+                value = round(value, 4)
+            elif isinstance(value, str):
+                value = value.casefold()
+            parts.append(f"{name}={value}")
+        return f"{urlsplit(url).path}?{'&'.join(parts)}"
+
+    def put(self, key, payload):
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            with open(self.data_file, "ab") as f:
+                offset = f.tell()
+                f.write(blob)
+            self.index[key] = [offset, len(blob), time.time()]
+            self._save_index()
+
+    # Returns (payload, recorded_at) or None
+    def get(self, key):
+        with self._lock:
+            entry = self.index.get(key)
+        if entry is None:
+            return None
+        offset, length, recorded_at = entry
+        try:
+            with open(self.data_file, "rb") as f:
+                f.seek(offset)
+                blob = f.read(length)
+            return json.loads(zlib.decompress(blob)), recorded_at
+        except (OSError, ValueError, zlib.error) as e:
+            log.warning("Archive entry %s unreadable: %s", key, e)
+            return None
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    # Bytes on disk vs bytes still referenced by the index
+    def sizes(self):
+        with self._lock:
+            live = sum(entry[1] for entry in self.index.values())
+        try:
+            total = os.path.getsize(self.data_file)
+        except OSError:
+            total = 0
+        return total, live
+
+    # Rewrite responses.dat with only the newest body per key
+    def compact(self):
+        with self._lock:
+            tmp = f"{self.data_file}.tmp"
+            index = {}
+            with open(self.data_file, "rb") as src, open(tmp, "wb") as dst:
+                for key, (offset, length, recorded_at) in self.index.items():
+                    src.seek(offset)
+                    index[key] = [dst.tell(), length, recorded_at]
+                    dst.write(src.read(length))
+            os.replace(tmp, self.data_file)
+            self.index = index
+            self._save_index()
+
+# -------------------------------------------------------------
+# RECORD / REPLAY TRANSPORTS
+# -------------------------------------------------------------
+# Live transport that also stores every good response in the archive.
+# Re-recording the same request replaces it, the file is compacted once
+# replaced bodies take up more room than live ones.
+class RecordingTransport(Transport):
+
+    def __init__(self, archive, **options):
+        super().__init__(**options)
+        self.archive = archive
+        self.recorded = 0
+
+    def get_json(self, name, url, params):
+        data = super().get_json(name, url, params)
+        try:
+            self.archive.put(self.archive.make_key(url, params), data)
+            self.recorded += 1
+            total, live = self.archive.sizes()
+            if total > 2 * live:
+                self.archive.compact()
+        except OSError as e:
+            log.warning("Could not record %s: %s", name, e)
+        return data
+
+    def stats(self):
+        return {**super().stats(), "mode": "record", "recorded": self.recorded, "archived": len(self.archive)}
+
+# Serves everything from the archive and never opens a socket
+class ReplayTransport:
+
+    offline = True
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.session = None
+        self.hits = 0
+        self.misses = 0
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get_json(self, name, url, params):
+        started = time.perf_counter()
+        hit = self.archive.get(self.archive.make_key(url, params))
+        ms = (time.perf_counter() - started) * 1000
+        metrics.observe(f"http.{name}", ms)
+        with self._lock:
+            stats = self._stats.setdefault(name, EndpointStats())
+            stats.record(ms, hit is not None)
+            if hit is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if hit is None:
+            raise ReplayMissError(f"{name}: not in archive {self.archive.path}")
+        return hit[0]
+
+    def stats(self):
+        with self._lock:
+            endpoints = {name: s.snapshot() for name, s in self._stats.items()}
+        return {"endpoints": endpoints, "breaker": "closed", "mode": "replay",
+                "hits": self.hits, "misses": self.misses, "archived": len(self.archive)}
@@ -0,0 +1,65 @@
+import json
+import hashlib
+from functools import cached_property
+from forecastSeries import ForecastSeries, SECONDS_PER_DAY
+from metrics import metrics
+
+# -------------------------------------------------------------
+# WEATHER BUNDLE
+# -------------------------------------------------------------
+# Everything one refresh needs, in the shape of one /weather and one
+# /forecast response (providers with other APIs normalize to it). The
+# bundle never talks to the network, the hourly, daily and summary views are
+# derived from the forecast on first use and then memoized.
+class WeatherBundle:
+
+    def __init__(self, current, forecast, location=None, outlook=None):
+        self.current = current
+        self.forecast = forecast
+        # Location the payloads were fetched for
+        self.location = location
+        # Optional whole-day summaries [{"dt", "min", "max", "icon"}] from
+        # providers that have them, they win over the forecast's own days
+        self.outlook = outlook or []
+        # Set by WeatherFetcher, which fetch this bundle came from
+        self.generation = None
+
+    # 3-hour steps
+    @cached_property
+    def hourly(self):
+        return self.forecast.get("list", [])
+
+    # Columnar copy of the forecast used for aggregation
+    @cached_property
+    def series(self):
+        with metrics.span("aggregate.series"):
+            return ForecastSeries.from_forecast(self.forecast)
+
+    # Forecast entries grouped by the city's local date, "YYYY-MM-DD" -> [entries]
+    @cached_property
+    def daily(self):
+        hourly = self.hourly
+        return {date: hourly[span] for date, span in self.series.day_slices().items()}
+
+    # Per day min/max temperature and the most common icon
+    @cached_property
+    def summary(self):
+        series = self.series
+        with metrics.span("aggregate.summary"):
+            summary = series.daily_summary()
+            for day in self.outlook:
+                key = series.date_key((day["dt"] + series.tz_offset) // SECONDS_PER_DAY)
+                summary[key] = {"min": day["min"], "max": day["max"], "icon": day["icon"]}
+            return dict(sorted(summary.items()))
+
+    # Content hash of both payloads, equal digests render identically
+    @cached_property
+    def digest(self):
+        raw = json.dumps([self.current, self.forecast, self.outlook], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    # Old dict style access, bundle["current"] / ["hourly"] / ["daily"]
+    def __getitem__(self, key):
+        if key not in ("current", "hourly", "daily"):
+            raise KeyError(key)
+        return getattr(self, key)
@@ -0,0 +1,119 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+# OpenWeather refreshes current observations roughly every 10 minutes and the
+# 5 day / 3 hour forecast a few times a day, so there is no point asking more
+# often than this. Anything older than MAX_STALE is useless even as a placeholder.
+CURRENT_TTL = 10 * 60
+FORECAST_TTL = 60 * 60
+MAX_STALE = 24 * 60 * 60
+
+# Entry file names, sha1 of the key
+ENTRY_NAME = re.compile(r"[0-9a-f]{40}\.json")
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "weather_lounge")
+
+# -------------------------------------------------------------
+# ON-DISK RESPONSE CACHE
+# -------------------------------------------------------------
+# One small JSON file per (endpoint, lat, lon, units). Entries past their TTL
+# are still served as stale data while a fresh copy is fetched, entries past
+# max_stale are evicted, and the oldest entries go once max_entries is hit.
+# Entries live in their own responses/ subdirectory: eviction only ever
+# looks there, so other files the app keeps under path are never touched.
+class ResponseCache:
+
+    def __init__(self, path=None, max_entries=200, max_stale=MAX_STALE):
+        self.path = path or default_cache_dir()
+        self.entries_path = os.path.join(self.path, "responses")
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self._lock = threading.Lock()
+        os.makedirs(self.entries_path, exist_ok=True)
+        self._drop_legacy_entries()
+
+    @staticmethod
+    def make_key(endpoint, lat, lon, units):
+        return (endpoint, round(float(lat), 4), round(float(lon), 4), units)
+
+    def _file(self, key):
+        digest = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.entries_path, f"{digest}.json")
+
+    # Returns (payload, age_seconds) or None
+    def get(self, key):
+        try:
+            with open(self._file(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        age = time.time() - entry.get("stored", 0)
+        if age > self.max_stale:
+            self._remove(self._file(key))
+            return None
+        return entry["payload"], age
+
+    # Payload only if younger than ttl
+    def get_fresh(self, key, ttl):
+        hit = self.get(key)
+        if hit and hit[1] <= ttl:
+            return hit[0]
+        return None
+
+    def put(self, key, payload):
+        entry = {"key": list(key), "stored": time.time(), "payload": payload}
+        target = self._file(key)
+        tmp = f"{target}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, separators=(",", ":"))
+            os.replace(tmp, target)
+            self.evict()
+
+    # Drop expired entries, then the oldest ones until under max_entries
+    def evict(self):
+        now = time.time()
+        files = []
+        for name in os.listdir(self.entries_path):
+            if not name.endswith(".json"):
+                continue
+            full = os.path.join(self.entries_path, name)
+            try:
+                mtime = os.path.getmtime(full)
+            except OSError:
+                continue
+            if now - mtime > self.max_stale:
+                self._remove(full)
+            else:
+                files.append((mtime, full))
+
+        if len(files) > self.max_entries:
+            files.sort()
+            for _, full in files[:len(files) - self.max_entries]:
+                self._remove(full)
+
+    # Earlier versions kept entries directly in path, next to app state such as
+    # last_location.json. Only files named like an entry are removed.
+    def _drop_legacy_entries(self):
+        for name in os.listdir(self.path):
+            if ENTRY_NAME.fullmatch(name):
+                self._remove(os.path.join(self.path, name))
+
+    def clear(self):
+        with self._lock:
+            for name in os.listdir(self.entries_path):
+                self._remove(os.path.join(self.entries_path, name))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import logging
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from openWeatherMapAPI import OpenWeatherClient, Location
+from weatherBundle import WeatherBundle
+from weatherCache import ResponseCache, default_cache_dir
+from weatherTransport import Transport
+from placeSearch import GeocodeCache
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+
+# Paths that take a place (lat, lon)
+PLACE_PATHS = ("/data/2.5/weather", "/data/2.5/forecast", "/data/3.0/onecall", "/hourly", "/daily")
+
+# Unknown path (404)
+class NotFound(Exception):
+    pass
+
+# Missing or malformed query parameter (400). Anything else raised while
+# answering a request is an upstream failure (502).
+class BadRequest(Exception):
+    pass
+
+def query_value(query, name, convert=str, default=None):
+    values = query.get(name)
+    if not values and default is None:
+        raise BadRequest(f"missing {name}")
+    try:
+        return convert(values[0] if values else default)
+    except ValueError as e:
+        raise BadRequest(f"{name}: {e}") from e
+
+# -------------------------------------------------------------
+# LOCAL WEATHER DAEMON
+# -------------------------------------------------------------
+# Headless OpenWeatherClient behind a small HTTP server. It speaks the same
+# /data/2.5/weather, /data/2.5/forecast, /data/3.0/onecall and /geo/1.0/direct
+# paths as OpenWeather, so a widget only has to change its base URL, and adds
+# /hourly, /daily and /stats. Every location is fetched upstream once per
+# cache period, concurrent misses for the same key are coalesced, and any
+# number of widgets are served from that one copy. No Qt import.
+# Responses and geocodes are kept under cache_dir, by default the directory
+# of an injected cache or the user's cache directory.
+class WeatherDaemon:
+
+    def __init__(self, api_key, host="127.0.0.1", port=DEFAULT_PORT, cache=None, transport=None, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = cache.path if cache is not None else os.path.join(default_cache_dir(), "daemon")
+        self.client = OpenWeatherClient(
+            api_key, "daemon", cache=cache or ResponseCache(cache_dir),
+            geo_cache=GeocodeCache(os.path.join(cache_dir, "geocode.json")),
+            lat=0, lon=0, transport=transport,
+        )
+        self.served = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                daemon.handle(self)
+
+            def log_message(self, fmt, *args):
+                log.debug("%s - %s", self.address_string(), fmt % args)
+
+        return Handler
+
+    # The client coalesces concurrent misses for the same (endpoint, place)
+    def current(self, loc):
+        return self.client.get_current_weather(loc)
+
+    def forecast(self, loc):
+        return self.client.get_forecast(loc)
+
+    def onecall(self, loc):
+        return self.client.get_onecall(loc)
+
+    def geocode(self, query, limit):
+        return self.client.geocode(query, limit)
+
+    def stats(self):
+        return {
+            "served": self.served,
+            "upstream": dict(self.client.request_counts),
+            "coalesced": self.client.flights.coalesced,
+            "transport": self.client.transport_stats(),
+        }
+
+    def route(self, path, query):
+        if path == "/stats":
+            return self.stats()
+        if path == "/geo/1.0/direct":
+            return self.geocode(query_value(query, "q"), query_value(query, "limit", int, 10))
+        if path not in PLACE_PATHS:
+            raise NotFound(path)
+
+        lat = round(query_value(query, "lat", float), 4)
+        lon = round(query_value(query, "lon", float), 4)
+        loc = Location(f"{lat},{lon}", lat, lon)
+
+        if path == "/data/2.5/weather":
+            return self.current(loc)
+        if path == "/data/2.5/forecast":
+            return self.forecast(loc)
+        if path == "/data/3.0/onecall":
+            return self.onecall(loc)
+        if path == "/hourly":
+            return WeatherBundle({}, self.forecast(loc), loc).hourly
+        if path == "/daily":
+            bundle = WeatherBundle({}, self.forecast(loc), loc)
+            return {date: {**bundle.summary[date], "entries": entries} for date, entries in bundle.daily.items()}
+
+    def handle(self, request):
+        parts = urlsplit(request.path)
+        try:
+            status, body = 200, self.route(parts.path, parse_qs(parts.query))
+        except NotFound:
+            status, body = 404, {"cod": 404, "message": "not found"}
+        except BadRequest as e:
+            status, body = 400, {"cod": 400, "message": f"bad request: {e}"}
+        except Exception as e:
+            log.warning("Upstream failure for %s: %s", request.path, e)
+            status, body = 502, {"cod": 502, "message": str(e)}
+
+        # Counted before the body goes out, so a client that has its response
+        # already sees it in /stats
+        with self._lock:
+            self.served += 1
+        payload = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def serve_forever(self):
+        log.info("Weather daemon listening on %s", self.url)
+        self.server.serve_forever()
+
+    # Run in a background thread (tests, load tests, embedding)
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever, name="weather-daemon", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Share one OpenWeather feed between many widgets")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--config", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    with open(args.config, "r") as f:
+        config = json.load(f)
+
+    daemon = WeatherDaemon(config["key"], args.host, args.port, transport=Transport.from_config(config.get("http")))
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,214 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    lat INTEGER NOT NULL, lon INTEGER NOT NULL, dt INTEGER NOT NULL,
+    temp REAL, humidity REAL, wind REAL, icon TEXT,
+    PRIMARY KEY (lat, lon, dt)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS observations_hourly (
+    lat INTEGER NOT NULL, lon INTEGER NOT NULL, hour INTEGER NOT NULL,
+    temp_min REAL, temp_max REAL, temp_sum REAL, humidity_sum REAL, wind_sum REAL, samples INTEGER,
+    PRIMARY KEY (lat, lon, hour)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS forecasts (
+    lat INTEGER NOT NULL, lon INTEGER NOT NULL, issued INTEGER NOT NULL, target INTEGER NOT NULL,
+    temp REAL, humidity REAL, pop REAL, icon TEXT,
+    PRIMARY KEY (lat, lon, target, issued)
+) WITHOUT ROWID;
+"""
+
+# Places are stored as 1e-4 degree integers, the same rounding the caches use
+def place_key(location):
+    return round(location.lat * 10000), round(location.lon * 10000)
+
+# -------------------------------------------------------------
+# HISTORY STORE
+# -------------------------------------------------------------
+# Every observation and forecast the app shows, in SQLite. Tables are
+# clustered on (place, time) so a range query is one index scan.
+#   observations         raw readings, kept raw_days
+#   observations_hourly  older readings rolled up per hour (min/max/sums so
+#                        averages re-aggregate exactly), kept keep_days
+#   forecasts            at most one snapshot per hour, thinned to one per day
+#                        after raw_days
+# maintain() does the downsampling and keeps the file under max_bytes by
+# dropping the oldest forecasts, then the oldest hours. One connection
+# shared by all threads.
+class HistoryStore:
+
+    def __init__(self, path, raw_days=14, keep_days=400, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.raw_days = raw_days
+        self.keep_days = keep_days
+        self.max_bytes = max_bytes
+        self.last_maintained = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # auto_vacuum only takes effect on a new file, it lets maintain() give pages back
+        self.db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+
+    # One unit of work. The connection runs in autocommit mode (isolation_level
+    # None), so without an explicit BEGIN every statement would commit alone
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    @classmethod
+    def from_config(cls, path, options):
+        options = dict(options or {})
+        max_mb = options.pop("max_mb", 50)
+        return cls(path, max_bytes=max_mb * 1024 * 1024, **options)
+
+    # Append one refresh, repeated payloads (cache hits) are no-ops
+    def record(self, bundle, now=None):
+        now = time.time() if now is None else now
+        lat, lon = place_key(bundle.location)
+        current = bundle.current
+        issued = int(now) // HOUR * HOUR
+        with self._transaction():
+            if current:
+                self.db.execute(
+                    "INSERT OR IGNORE INTO observations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (lat, lon, current["dt"], current["main"]["temp"], current["main"].get("humidity"),
+                     current.get("wind", {}).get("speed"), current["weather"][0]["icon"]),
+                )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(lat, lon, issued, e["dt"], e["main"]["temp"], e["main"].get("humidity"),
+                  e.get("pop", 0.0), e["weather"][0]["icon"]) for e in bundle.hourly],
+            )
+        if now - self.last_maintained > HOUR:
+            self.maintain(now)
+
+    # Roll up and drop old rows, then shrink the file if it is over budget
+    def maintain(self, now=None):
+        now = time.time() if now is None else now
+        self.last_maintained = now
+        raw_cutoff = int(now - self.raw_days * DAY) // HOUR * HOUR
+        keep_cutoff = int(now - self.keep_days * DAY)
+        # Rolling up and deleting the raw rows must commit together, or a crash
+        # in between would count those readings twice next time
+        with self._transaction():
+            self.db.execute("""
+                INSERT INTO observations_hourly
+                SELECT lat, lon, dt / 3600 * 3600, MIN(temp), MAX(temp), SUM(temp), SUM(humidity), SUM(wind), COUNT(*)
+                FROM observations WHERE dt < ? GROUP BY lat, lon, dt / 3600
+                ON CONFLICT (lat, lon, hour) DO UPDATE SET
+                    temp_min = MIN(temp_min, excluded.temp_min),
+                    temp_max = MAX(temp_max, excluded.temp_max),
+                    temp_sum = temp_sum + excluded.temp_sum,
+                    humidity_sum = humidity_sum + excluded.humidity_sum,
+                    wind_sum = wind_sum + excluded.wind_sum,
+                    samples = samples + excluded.samples
+            """, (raw_cutoff,))
+            self.db.execute("DELETE FROM observations WHERE dt < ?", (raw_cutoff,))
+            self.db.execute("DELETE FROM observations_hourly WHERE hour < ?", (keep_cutoff,))
+
+            # Old forecast snapshots: keep the last one issued each day
+            self.db.execute("""
+                DELETE FROM forecasts WHERE issued < ? AND issued NOT IN (
+                    SELECT MAX(issued) FROM forecasts WHERE issued < ? GROUP BY lat, lon, issued / 86400
+                )
+            """, (raw_cutoff, raw_cutoff))
+            self.db.execute("DELETE FROM forecasts WHERE target < ?", (keep_cutoff,))
+        self._enforce_size()
+
+    def size_bytes(self):
+        page_size = self.db.execute("PRAGMA page_size").fetchone()[0]
+        pages = self.db.execute("PRAGMA page_count").fetchone()[0]
+        free = self.db.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free) * page_size
+
+    # Until under max_bytes: drop the oldest tenth of the forecast snapshots
+    # (the latest one is kept), and only once those are gone the oldest tenth
+    # of the hourly rollups. Forecasts add a row per slot on every refresh
+    # against one per observation, and the observation history is what the
+    # trend views need.
+    def _enforce_size(self):
+        with self._lock:
+            while self.size_bytes() > self.max_bytes:
+                first, last = self.db.execute("SELECT MIN(issued), MAX(issued) FROM forecasts").fetchone()
+                if first is not None and first < last:
+                    cutoff = min(last, first + max(HOUR, (last - first) // 10))
+                    self.db.execute("DELETE FROM forecasts WHERE issued < ?", (cutoff,))
+                    continue
+                oldest = self.db.execute("SELECT MIN(hour), MAX(hour) FROM observations_hourly").fetchone()
+                if oldest[0] is None:
+                    break
+                cutoff = oldest[0] + max(HOUR, (oldest[1] - oldest[0]) // 10)
+                self.db.execute("DELETE FROM observations_hourly WHERE hour < ?", (cutoff,))
+            self.db.execute("PRAGMA incremental_vacuum")
+
+    # [(bucket_start, min, max, avg temp, avg humidity, avg wind, samples)] for
+    # start <= t < end, raw readings and hourly rollups merged into step second
+    # buckets counted from start (so a local midnight start gives local days)
+    def series(self, location, start, end, step=HOUR):
+        lat, lon = place_key(location)
+        with self._lock:
+            return self.db.execute("""
+                SELECT :start + (t - :start) / :step * :step AS bucket, MIN(tmin), MAX(tmax),
+                       SUM(tsum) / SUM(n), SUM(hsum) / SUM(n), SUM(wsum) / SUM(n), SUM(n)
+                FROM (
+                    SELECT dt AS t, temp AS tmin, temp AS tmax, temp AS tsum, humidity AS hsum, wind AS wsum, 1 AS n
+                    FROM observations WHERE lat = :lat AND lon = :lon AND dt >= :start AND dt < :end
+                    UNION ALL
+                    SELECT hour, temp_min, temp_max, temp_sum, humidity_sum, wind_sum, samples
+                    FROM observations_hourly WHERE lat = :lat AND lon = :lon AND hour >= :start AND hour < :end
+                )
+                GROUP BY bucket ORDER BY bucket
+            """, {"lat": lat, "lon": lon, "start": int(start), "end": int(end), "step": int(step)}).fetchall()
+
+    # Summary of one range as {"min", "max", "avg", "samples"} or None when empty
+    def summarize(self, location, start, end):
+        rows = self.series(location, start, end, step=end - start)
+        if not rows:
+            return None
+        _, low, high, avg, _, _, samples = rows[0]
+        return {"min": low, "max": high, "avg": avg, "samples": samples}
+
+    # Today so far against the same hours yesterday, in the city's local time
+    def yesterday_vs_today(self, location, tz_offset=0, now=None):
+        now = int(time.time() if now is None else now)
+        midnight = (now + tz_offset) // DAY * DAY - tz_offset
+        today = self.summarize(location, midnight, now + 1)
+        yesterday = self.summarize(location, midnight - DAY, now + 1 - DAY)
+        if today is None or yesterday is None:
+            return None
+        return {"today": today, "yesterday": yesterday, "delta": today["avg"] - yesterday["avg"]}
+
+    # How the forecast for one target time changed: [(issued, temp, pop, icon)]
+    def forecast_trend(self, location, target):
+        lat, lon = place_key(location)
+        with self._lock:
+            return self.db.execute(
+                "SELECT issued, temp, pop, icon FROM forecasts WHERE lat = ? AND lon = ? AND target = ? ORDER BY issued",
+                (lat, lon, int(target)),
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self.db.close()
@@ -0,0 +1,129 @@
+import time
+from weatherBundle import WeatherBundle
+
+FORECAST_SLOT = 3 * 60 * 60
+
+# -------------------------------------------------------------
+# WEATHER PROVIDERS
+# -------------------------------------------------------------
+# A provider knows which requests one refresh needs and how to turn their
+# payloads into a WeatherBundle. requests() returns zero-argument callables
+# so callers decide how to run them (the fetcher runs them concurrently on
+# its pool), assemble() receives their results in the same order. All
+# network access goes through the client, so caching, the transport and
+# request counting behave the same for every provider.
+class WeatherProvider:
+    name = None
+
+    def __init__(self, client):
+        self.client = client
+
+    def requests(self, location):
+        raise NotImplementedError
+
+    def assemble(self, results, location):
+        raise NotImplementedError
+
+    # Last known bundle for a location from the response cache, or None
+    def cached(self, location):
+        raise NotImplementedError
+
+    def fetch(self, location):
+        return self.assemble([request() for request in self.requests(location)], location)
+
+# Free tier 2.5 API: /weather and /forecast, two requests per refresh
+class OpenWeather25(WeatherProvider):
+    name = "2.5"
+
+    def requests(self, location):
+        return [
+            lambda: self.client.get_current_weather(location),
+            lambda: self.client.get_forecast(location),
+        ]
+
+    def assemble(self, results, location):
+        current, forecast = results
+        return WeatherBundle(current, forecast, location)
+
+    def cached(self, location):
+        current = self.client.cached_payload("weather", location)
+        forecast = self.client.cached_payload("forecast", location)
+        if current is None or forecast is None:
+            return None
+        return WeatherBundle(current, forecast, location)
+
+# One Call 3.0: current, hourly and daily in a single request
+class OneCall30(WeatherProvider):
+    name = "onecall3"
+
+    def requests(self, location):
+        return [lambda: self.client.get_onecall(location)]
+
+    def assemble(self, results, location):
+        return onecall_bundle(results[0], location)
+
+    def cached(self, location):
+        data = self.client.cached_payload("onecall", location)
+        return onecall_bundle(data, location) if data is not None else None
+
+PROVIDERS = {provider.name: provider for provider in (OpenWeather25, OneCall30)}
+
+def make_provider(name, client):
+    try:
+        return PROVIDERS[name](client)
+    except KeyError:
+        raise ValueError(f"Unknown weather provider '{name}', expected one of {', '.join(PROVIDERS)}") from None
+
+# -------------------------------------------------------------
+# ONE CALL 3.0 -> 2.5 SHAPES
+# -------------------------------------------------------------
+def onecall_current(data):
+    c = data["current"]
+    return {
+        "dt": c["dt"],
+        "timezone": data.get("timezone_offset", 0),
+        "main": {
+            "temp": c["temp"],
+            "feels_like": c.get("feels_like"),
+            "pressure": c.get("pressure"),
+            "humidity": c.get("humidity", 0),
+        },
+        "weather": c["weather"],
+        "wind": {"speed": c.get("wind_speed", 0.0), "deg": c.get("wind_deg")},
+        "clouds": {"all": c.get("clouds", 0)},
+        "visibility": c.get("visibility"),
+        "sys": {"sunrise": c.get("sunrise"), "sunset": c.get("sunset")},
+    }
+
+# The UI works in 3 hour slots, so the 48 hourly entries are thinned to the
+# ones on 3 hour UTC boundaries, the same times /forecast uses
+def onecall_forecast(data):
+    entries = []
+    for h in data.get("hourly", []):
+        if h["dt"] % FORECAST_SLOT:
+            continue
+        entries.append({
+            "dt": h["dt"],
+            "main": {"temp": h["temp"], "feels_like": h.get("feels_like"), "humidity": h.get("humidity", 0)},
+            "weather": h["weather"],
+            "pop": h.get("pop", 0.0),
+            "wind": {"speed": h.get("wind_speed", 0.0), "deg": h.get("wind_deg")},
+            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(h["dt"])),
+        })
+    return {
+        "list": entries,
+        "city": {
+            "timezone": data.get("timezone_offset", 0),
+            "coord": {"lat": data.get("lat"), "lon": data.get("lon")},
+        },
+    }
+
+# Whole-day min/max for all 8 days, beyond the 48 hours covered above
+def onecall_outlook(data):
+    return [
+        {"dt": d["dt"], "min": d["temp"]["min"], "max": d["temp"]["max"], "icon": d["weather"][0]["icon"]}
+        for d in data.get("daily", [])
+    ]
+
+def onecall_bundle(data, location):
+    return WeatherBundle(onecall_current(data), onecall_forecast(data), location, onecall_outlook(data))
@@ -0,0 +1,289 @@
+import time
+import random
+import logging
+import threading
+import requests
+from concurrent.futures import Future
+from requests.adapters import HTTPAdapter
+from metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# The free tier allows 60 calls a minute, stay a little under it
+DEFAULT_RATE_PER_MINUTE = 50
+
+# Raised instead of sending anything while the breaker is open. It is a
+# RequestException so callers that fall back to cached data already handle it.
+class CircuitOpenError(requests.RequestException):
+    pass
+
+# -------------------------------------------------------------
+# TOKEN BUCKET
+# -------------------------------------------------------------
+# Refills rate_per_minute tokens a minute up to burst. acquire() sleeps the
+# calling (worker) thread until a token is free.
+class TokenBucket:
+
+    def __init__(self, rate_per_minute=DEFAULT_RATE_PER_MINUTE, burst=10):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# -------------------------------------------------------------
+# CIRCUIT BREAKER
+# -------------------------------------------------------------
+# After failure_threshold consecutive failures the breaker opens and no
+# requests are sent for reset_after seconds. Then a single trial request is
+# let through, success closes it again, failure re-opens it.
+class CircuitBreaker:
+
+    def __init__(self, failure_threshold=5, reset_after=60):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+# -------------------------------------------------------------
+# SINGLE FLIGHT
+# -------------------------------------------------------------
+# Concurrent calls for the same key share one execution: the first caller
+# runs fn, everyone arriving while it runs waits for and gets its result.
+class SingleFlight:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return call.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+# Latency and error counters for one endpoint
+class EndpointStats:
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, ms, ok):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.total_ms += ms
+        self.last_ms = ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def snapshot(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": self.total_ms / self.requests if self.requests else 0.0,
+            "max_ms": self.max_ms,
+            "last_ms": self.last_ms,
+        }
+
+# -------------------------------------------------------------
+# HTTP TRANSPORT
+# -------------------------------------------------------------
+# Pooled keep-alive session with gzip, connect/read timeouts, retries with
+# exponential backoff and full jitter for 429/5xx/network errors, a token
+# bucket for the API quota and a circuit breaker.
+class Transport:
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+    # Replay transports serve from disk and set this, nothing else may go online then
+    offline = False
+
+    def __init__(self, connect_timeout=3.05, read_timeout=10, retries=3, backoff=0.5, max_backoff=8,
+                 rate_per_minute=DEFAULT_RATE_PER_MINUTE, burst=10, pool_size=8,
+                 failure_threshold=5, reset_after=60):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = TokenBucket(rate_per_minute, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_after)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    # "mode": "record" or "replay" (with an optional "archive" directory)
+    # swaps in the archive backed transports from weatherArchive
+    @classmethod
+    def from_config(cls, options):
+        options = dict(options or {})
+        mode = options.pop("mode", "live")
+        archive_dir = options.pop("archive", None)
+        if mode == "live":
+            return cls(**options)
+
+        from weatherArchive import WeatherArchive, RecordingTransport, ReplayTransport
+        if mode == "record":
+            return RecordingTransport(WeatherArchive(archive_dir), **options)
+        if mode == "replay":
+            return ReplayTransport(WeatherArchive(archive_dir))
+        raise ValueError(f"Unknown http mode '{mode}'")
+
+    def _endpoint(self, name):
+        with self._lock:
+            return self._stats.setdefault(name, EndpointStats())
+
+    def _sleep_before_retry(self, attempt, response=None):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            delay = max(delay, int(response.headers["Retry-After"]))
+        time.sleep(delay)
+
+    # GET and decode JSON, raising requests exceptions once retries run out
+    def get_json(self, name, url, params):
+        stats = self._endpoint(name)
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{name}: API unavailable, circuit open")
+
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            started = time.perf_counter()
+            response = None
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                retryable = response.status_code in self.RETRY_STATUS
+                if not retryable:
+                    response.raise_for_status()
+                    with metrics.span(f"parse.{name}"):
+                        data = response.json()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retryable, error = True, e
+            except requests.HTTPError:
+                # 4xx other than 429 is our fault (bad key, bad city), retrying will not
+                # help, but the API did answer so the breaker counts it as up
+                self._record(name, stats, started, ok=False)
+                self.breaker.record_success()
+                raise
+            except ValueError:
+                # Garbled body
+                self._record(name, stats, started, ok=False)
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # Anything else (ChunkedEncodingError, TooManyRedirects, ...) still
+                # counts, otherwise a half-open trial would never end
+                self._record(name, stats, started, ok=False)
+                self.breaker.record_failure()
+                raise
+            else:
+                error = None
+
+            if not retryable:
+                self._record(name, stats, started, ok=True)
+                self.breaker.record_success()
+                return data
+
+            self._record(name, stats, started, ok=False)
+            if attempt >= self.retries:
+                self.breaker.record_failure()
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+
+            with self._lock:
+                stats.retries += 1
+            log.info("%s attempt %d failed, retrying", name, attempt + 1)
+            self._sleep_before_retry(attempt, response)
+            attempt += 1
+
+    def _record(self, name, stats, started, ok):
+        ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats.record(ms, ok)
+        metrics.observe(f"http.{name}", ms)
+
+    # {endpoint: {...}} plus the breaker state
+    def stats(self):
+        with self._lock:
+            endpoints = {name: s.snapshot() for name, s in self._stats.items()}
+        return {"endpoints": endpoints, "breaker": self.breaker.state}
@@ -0,0 +1,208 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from PyQt6.QtCore import Qt, QObject, QTimer, QElapsedTimer, pyqtSignal
+from metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# BACKGROUND FETCH PIPELINE
+# -------------------------------------------------------------
+# Runs the provider's requests (current + forecast, or a single One Call) on
+# worker threads and hands the bundle back to the GUI thread through Qt signals.
+# Every fetch gets a generation number. Asking again for the place already
+# being fetched joins that fetch; asking for another place supersedes it, its
+# queued requests are cancelled and whatever it still returns is dropped on
+# the GUI thread before ready/failed, so an older answer can never overwrite
+# a newer one. Requests already on the wire finish (and fill the cache).
+class WeatherFetcher(QObject):
+    # Emitted on the GUI thread with a WeatherBundle
+    ready = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    # {Location: WeatherBundle or exception} for fetch_many
+    many_ready = pyqtSignal(object)
+    # (query, [geo results]) / (query, error) for place searches
+    places_ready = pyqtSignal(str, object)
+    places_failed = pyqtSignal(str, str)
+    # Worker -> GUI thread: (generation, bundle or None, error message or None)
+    _done = pyqtSignal(int, object, object)
+
+    def __init__(self, api, max_workers=6, max_concurrency=8, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self.max_concurrency = max_concurrency
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather")
+        self._lock = threading.Lock()
+        self.generation = 0
+        self._current = None        # (generation, place key, [futures]) of the latest fetch
+        self.joined = 0
+        self.superseded = 0
+        self.dropped = 0
+        self._done.connect(self._deliver)
+
+    @staticmethod
+    def place_key(location):
+        return round(location.lat, 4), round(location.lon, 4)
+
+    @property
+    def in_flight(self):
+        with self._lock:
+            return self._current is not None
+
+    # Start every request at once, results arrive through ready/failed.
+    # The location is snapshotted here, so later city changes cannot mix
+    # coordinates into a running fetch. Returns the fetch's generation.
+    def fetch(self, location=None):
+        location = location or self.api.current_location()
+        key = self.place_key(location)
+        with self._lock:
+            current = self._current
+            if current is not None and current[1] == key:
+                self.joined += 1
+                metrics.count("fetch.joined")
+                return current[0]
+            if current is not None:
+                self.superseded += 1
+                metrics.count("fetch.superseded")
+                for future in current[2]:
+                    future.cancel()
+            self.generation += 1
+            generation = self.generation
+            provider = self.api.provider
+            parts = [self.pool.submit(request) for request in provider.requests(location)]
+            self._current = (generation, key, parts)
+
+        # Wait for the futures on a worker so the GUI thread never blocks
+        self.pool.submit(self._collect, generation, location, provider, parts)
+        return generation
+
+    def _collect(self, generation, location, provider, parts):
+        try:
+            result = provider.assemble([f.result() for f in parts], location)
+        except CancelledError:
+            return
+        except Exception as e:
+            log.warning("Weather fetch failed: %s", e)
+            self._done.emit(generation, None, str(e))
+        else:
+            result.generation = generation
+            self._done.emit(generation, result, None)
+
+    # GUI thread: only the newest fetch reaches the window
+    def _deliver(self, generation, result, error):
+        with self._lock:
+            if generation != self.generation:
+                self.dropped += 1
+                metrics.count("fetch.dropped")
+                log.debug("Dropping weather for superseded fetch %d (now %d)", generation, self.generation)
+                return
+            self._current = None
+        if error is not None:
+            self.failed.emit(error)
+        else:
+            self.ready.emit(result)
+
+    def stats(self):
+        with self._lock:
+            return {"generation": self.generation, "joined": self.joined,
+                    "superseded": self.superseded, "dropped": self.dropped}
+
+    # Refresh a batch of locations concurrently, results arrive through many_ready
+    def fetch_many(self, locations):
+        locations = list(locations)
+        if locations:
+            self.pool.submit(self._collect_many, locations)
+
+    def _collect_many(self, locations):
+        self.many_ready.emit(self.api.fetch_many(locations, self.max_concurrency))
+
+    # Resolve a place search on a worker thread
+    def geocode(self, query):
+        self.pool.submit(self._geocode, query)
+
+    def _geocode(self, query):
+        try:
+            results = self.api.geocode(query)
+        except Exception as e:
+            log.warning("Place search for %r failed: %s", query, e)
+            self.places_failed.emit(query, str(e))
+            return
+        self.places_ready.emit(query, results)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+# -------------------------------------------------------------
+# BACKGROUND TASKS
+# -------------------------------------------------------------
+# Runs one-off slow jobs (imports, device init, lookups) on a thread pool
+# and calls back on the GUI thread with the result.
+class BackgroundRunner(QObject):
+    _done = pyqtSignal(object, object)
+
+    def __init__(self, pool, parent=None):
+        super().__init__(parent)
+        self.pool = pool
+        self._done.connect(self._deliver)
+
+    def run(self, fn, callback=None, errback=None):
+        def job():
+            try:
+                result = fn()
+            except Exception as e:
+                log.warning("Background task %s failed: %s", getattr(fn, "__name__", fn), e)
+                self._done.emit(errback, e)
+                return
+            self._done.emit(callback, result)
+        self.pool.submit(job)
+
+    def _deliver(self, callback, result):
+        if callback:
+            callback(result)
+
+
+# -------------------------------------------------------------
+# EVENT LOOP STALL MONITOR
+# -------------------------------------------------------------
+# A short timer that measures how late it fires. Any lateness is time the
+# event loop was blocked, so the worst value seen during a refresh tells us
+# whether the UI stayed within its stall budget.
+class StallMonitor(QObject):
+    def __init__(self, interval_ms=10, budget_ms=50, parent=None):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self.budget_ms = budget_ms
+        self.max_stall_ms = 0
+        self.over_budget = 0
+
+        self._clock = QElapsedTimer()
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self):
+        self.reset()
+        self._clock.start()
+        self._timer.start(self.interval_ms)
+
+    def stop(self):
+        self._timer.stop()
+
+    def reset(self):
+        self.max_stall_ms = 0
+        self.over_budget = 0
+
+    def _tick(self):
+        elapsed = self._clock.restart()
+        stall = max(0, elapsed - self.interval_ms)
+        if stall > self.max_stall_ms:
+            self.max_stall_ms = stall
+        if stall > self.budget_ms:
+            self.over_budget += 1
+            log.warning("Event loop stalled for %d ms (budget %d ms)", stall, self.budget_ms)
+
+    def within_budget(self):
+        return self.max_stall_ms <= self.budget_ms
+